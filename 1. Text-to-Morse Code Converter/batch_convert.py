@@ -0,0 +1,165 @@
+import argparse  # Importing argparse to read the command-line options.
+import glob  # Importing glob to expand file patterns like 'logs/*.txt'.
+import os  # Importing the os module to work with files and folders.
+import sys  # Importing sys to set the exit code.
+import time  # Importing time to measure the conversion speed.
+from concurrent.futures import ProcessPoolExecutor  # Importing a process pool to use every CPU core.
+
+from main import CHUNK_SIZE, morse_file_to_text_file, text_file_to_morse_file
+
+# The file extensions used for Morse code files and decoded text files, and the default file patterns for folders.
+MORSE_EXTENSION = ".morse"
+DECODED_EXTENSION = ".decoded.txt"
+DEFAULT_PATTERNS = {"encode": "*.txt", "decode": "*" + MORSE_EXTENSION}
+
+
+# Function to find all the files that should be converted.
+def find_input_files(paths, pattern, recursive=False):
+    """
+    Expands folders and glob patterns into a sorted list of files.
+
+    :param paths: Folders, files or glob patterns given on the command line.
+    :param pattern: The file pattern used inside folders (for example '*.txt').
+    :param recursive: Whether to look inside subfolders as well.
+    :return: A sorted list of (file path, folder it was found in) pairs without duplicates.
+             The folder is None for single files and patterns.
+    """
+    files = {}
+    for path in paths:
+        if os.path.isdir(path):
+            # Look for matching files inside the folder (and its subfolders if requested).
+            search = os.path.join(path, "**", pattern) if recursive else os.path.join(path, pattern)
+            for file in glob.glob(search, recursive=recursive):
+                files.setdefault(file, path)
+        elif os.path.isfile(path):
+            files.setdefault(path, None)
+        else:
+            for file in glob.glob(path, recursive=recursive):  # Treat everything else as a pattern.
+                files.setdefault(file, None)
+    return sorted((file, folder) for file, folder in files.items() if os.path.isfile(file))
+
+
+# Function to decide where the converted file is written.
+def output_path(input_path, mode, base_folder=None, output_dir=None):
+    """
+    Builds the name of the output file for an input file.
+    Encoding adds '.morse' to the name. Decoding replaces '.morse' (and a '.txt' before it) with '.decoded.txt',
+    so 'notes.txt.morse' becomes 'notes.decoded.txt' and never overwrites the original 'notes.txt'.
+    With an output folder, the files keep their subfolders below the folder they were found in.
+
+    :param input_path: Path of the file being converted.
+    :param mode: 'encode' or 'decode'.
+    :param base_folder: The folder the file was found in, or None for single files.
+    :param output_dir: Folder for the output files, or None to write them next to the inputs.
+    :return: The path of the output file.
+    """
+    if mode == "encode":
+        name = input_path + MORSE_EXTENSION
+    else:
+        name = input_path[:-len(MORSE_EXTENSION)] if input_path.endswith(MORSE_EXTENSION) else input_path
+        if name.endswith(".txt"):
+            name = name[:-len(".txt")]
+        name += DECODED_EXTENSION
+    if output_dir is None:
+        return name
+    relative = os.path.relpath(name, base_folder) if base_folder else os.path.basename(name)
+    return os.path.join(output_dir, relative)
+
+
+# Function that converts one file. It runs inside the worker processes.
+def convert_file(job):
+    """
+    Converts a single file, streaming it through in chunks.
+
+    :param job: A tuple (input_path, output_path, mode, chunk_size).
+    :return: A tuple (input_path, output_path, bytes_read, seconds, error). error is None on success.
+    """
+    input_path, output_path, mode, chunk_size = job
+    start_time = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)  # Subfolders of the output folder.
+        if mode == "encode":
+            text_file_to_morse_file(input_path, output_path, chunk_size)
+        else:
+            morse_file_to_text_file(input_path, output_path, chunk_size)
+        size = os.path.getsize(input_path)
+    except (OSError, UnicodeError) as e:
+        return input_path, output_path, 0, time.perf_counter() - start_time, str(e)
+    return input_path, output_path, size, time.perf_counter() - start_time, None
+
+
+# Function to format a speed in megabytes per second.
+def format_speed(size, seconds):
+    return f"{size / max(seconds, 1e-9) / 1e6:.2f} MB/s"
+
+
+# Main function for the command-line tool.
+def main(argv=None):
+    """
+    Converts many files between text and Morse code in parallel.
+
+    :param argv: The command-line arguments (defaults to sys.argv).
+    :return: The exit code (0 if every file was converted).
+    """
+    parser = argparse.ArgumentParser(description="Convert many files between text and Morse code in parallel.")
+    parser.add_argument("mode", choices=["encode", "decode"], help="encode text to Morse code, or decode Morse code to text")
+    parser.add_argument("paths", nargs="+", help="files, folders or glob patterns to convert")
+    parser.add_argument("-o", "--output-dir", help="folder for the converted files (default: next to each input)")
+    parser.add_argument("-p", "--pattern", help="file pattern used inside folders (default: *.txt to encode, *.morse to decode)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="also look inside subfolders")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="number of worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="characters or bytes converted at a time")
+    parser.add_argument("-f", "--force", action="store_true", help="overwrite output files that already exist")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    files = find_input_files(args.paths, args.pattern or DEFAULT_PATTERNS[args.mode], args.recursive)
+    if not files:
+        print("No files found.")
+        return 1
+
+    jobs = []
+    seen = set()
+    failed = 0
+    for path, base in files:
+        output_file = output_path(path, args.mode, base, args.output_dir)
+        # Never write over an existing file (or the input itself) unless asked to,
+        # and never let two files be converted into the same output.
+        real_path = os.path.normcase(os.path.realpath(output_file))
+        if real_path in seen:
+            error = f"{output_file} is also the output of another file"
+        elif os.path.exists(output_file) and (not args.force or os.path.samefile(output_file, path)):
+            error = f"{output_file} already exists (use --force to overwrite it)"
+        else:
+            seen.add(real_path)
+            jobs.append((path, output_file, args.mode, args.chunk_size))
+            continue
+        failed += 1
+        print(f"SKIPPED {path}: {error}", file=sys.stderr)
+    # Send the small files to the workers in groups, so the overhead per file stays low.
+    chunksize = max(1, min(64, len(jobs) // (args.workers * 4)))
+
+    total_size = 0
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for input_path, output_file, size, seconds, error in executor.map(convert_file, jobs, chunksize=chunksize):
+            if error:
+                failed += 1
+                print(f"FAILED {input_path}: {error}", file=sys.stderr)
+                continue
+            total_size += size
+            if not args.quiet:
+                print(f"{input_path} -> {output_file}: {size / 1e6:.2f} MB in {seconds:.3f} s ({format_speed(size, seconds)})")
+    elapsed = time.perf_counter() - start_time
+
+    converted = len(files) - failed
+    print(f"Converted {converted} of {len(files)} files ({total_size / 1e6:.2f} MB) in {elapsed:.2f} s "
+          f"with {args.workers} worker(s): {converted / max(elapsed, 1e-9):.1f} files/s, {format_speed(total_size, elapsed)}")
+    return 1 if failed else 0
+
+
+# Run the command-line tool if this file is executed directly.
+if __name__ == "__main__":
+    sys.exit(main())
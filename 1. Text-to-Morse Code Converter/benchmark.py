@@ -0,0 +1,267 @@
+import argparse  # Importing argparse to read the command-line options.
+import json  # Importing json to store and compare baselines.
+import os  # Importing os to build the path of the check file.
+import random  # Importing random to generate the test texts.
+import sys  # Importing sys to stub winsound and set the exit code.
+import tempfile  # Importing tempfile for a folder to write the check file in.
+import time  # Importing time to measure the speed.
+import tracemalloc  # Importing tracemalloc to measure the peak memory.
+import types  # Importing types to create the winsound stub.
+
+# Replace winsound with a silent stub before main.py is imported,
+# so the benchmark never plays sound and runs the same way on every operating system.
+winsound_stub = types.ModuleType("winsound")
+winsound_stub.SND_MEMORY = 4
+winsound_stub.Beep = lambda frequency, duration: None
+winsound_stub.PlaySound = lambda sound, flags: None
+sys.modules["winsound"] = winsound_stub
+
+import main  # noqa: E402  (main.py has to be imported after the stub is in place)
+
+# The sizes of the generated texts, in characters.
+CORPUS_SIZES = {"small": 10_000, "medium": 1_000_000, "large": 10_000_000}
+
+# The characters each text is made of. 'unknown' includes characters without Morse code (they become '?').
+CORPUS_MIXES = {
+    "letters": "ETAOINSHRDLCUMWFGYPBVKJXQZ" + " " * 5,
+    "mixed": "".join(main.MORSE_CODE_DICT) + "etaoinshrdlu" + " " * 8,
+    "unknown": "ETAOINSHRDLU0123456789" + " " * 5 + "#%*<>[]{}|~^éüß€",
+}
+
+# Rendering sound makes far more data than text, so it is measured on a shorter slice of the text.
+RENDER_CHARS = 20_000
+
+
+# Function to generate a test text.
+def make_corpus(size, mix, seed=1234):
+    """
+    Generates a random text that is the same on every run.
+
+    :param size: Number of characters.
+    :param mix: Name of the character mix in CORPUS_MIXES.
+    :param seed: Seed for the random generator.
+    :return: The generated text.
+    """
+    rng = random.Random(f"{seed}-{mix}-{size}")
+    return "".join(rng.choices(CORPUS_MIXES[mix], k=size))
+
+
+# The code paths that are measured. Each one gets the text and its Morse code and returns
+# the function to time together with the text it handles.
+def encode(text, morse_code):
+    return lambda: main.text_to_morse(text), text
+
+
+def encode_stream(text, morse_code):
+    chunks = [text[i:i + main.CHUNK_SIZE] for i in range(0, len(text), main.CHUNK_SIZE)]
+    return lambda: sum(map(len, main.text_to_morse_stream(chunks))), text
+
+
+def decode(text, morse_code):
+    return lambda: main.morse_to_text(morse_code), text
+
+
+def decode_stream(text, morse_code):
+    data = morse_code.encode("ascii")
+    chunks = [data[i:i + main.CHUNK_SIZE] for i in range(0, len(data), main.CHUNK_SIZE)]
+    return lambda: sum(map(len, main.morse_to_text_stream(chunks))), text
+
+
+def binary_encode(text, morse_code):
+    return lambda: main.text_to_binary(text), text
+
+
+def binary_decode(text, morse_code):
+    data = main.text_to_binary(text)
+    return lambda: main.binary_to_text(data), text
+
+
+def render(text, morse_code):
+    text = text[:RENDER_CHARS]
+    short_morse = main.text_to_morse(text)
+    # The samples are counted and thrown away, so the memory of the finished sound is not measured.
+    return lambda: sum(map(len, main.morse_to_pcm_stream(short_morse, wpm=20, sample_rate=8000))), text
+
+
+PATHS = {
+    "encode": encode,
+    "encode_stream": encode_stream,
+    "decode": decode,
+    "decode_stream": decode_stream,
+    "binary_encode": binary_encode,
+    "binary_decode": binary_decode,
+    "render": render,
+}
+
+
+# Function to measure one code path on one text.
+def measure(path, text, morse_code, repeat):
+    """
+    Times a code path and measures its peak memory.
+    The speed is the best of several runs. The memory is measured in a separate run,
+    because tracemalloc slows the code down.
+
+    :return: A dictionary with the results.
+    """
+    run, handled_text = PATHS[path](text, morse_code)
+    if handled_text is not text:
+        morse_code = main.text_to_morse(handled_text)
+    characters = len(handled_text)
+    symbols = morse_code.count(".") + morse_code.count("-")  # The dots and dashes handled.
+
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    run()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "seconds": best,
+        "chars_per_sec": characters / best,
+        "symbols_per_sec": symbols / best,
+        "peak_memory": peak_memory,
+    }
+
+
+# Function to check that the random-access reader gives back every word of a text.
+def check_word_reader(text, chunk_size=64):
+    """
+    Writes the text as a binary Morse file in small blocks and reads it back one word at a time
+    with BinaryMorseReader, up to and including the last word of the file.
+
+    :return: A list of messages, one per word that did not come back correctly.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        text_filename, binary_filename = os.path.join(folder, 'check.txt'), os.path.join(folder, 'check.bin')
+        with open(text_filename, 'w') as file:
+            file.write(text)
+        main.text_file_to_binary_file(text_filename, binary_filename, chunk_size=chunk_size)
+        with main.BinaryMorseReader(binary_filename) as reader:
+            words = reader.read_characters(0, reader.characters).split(' ')
+            return [f"word {number} of {text[:20]!r}: read {reader.read_words(number)!r}, expected {word!r}"
+                    for number, word in enumerate(words) if reader.read_words(number) != word]
+
+
+# Texts the sound decoder must read back. Letters of a single element ('E', 'T') and letters of one kind of
+# element ('I', 'M') are the hardest, because the length of a dot has to be worked out from the gaps.
+WAV_CHECK_TEXTS = ("T T", "E E E", "EE", "TT T", "I E", "M", "O", "SOS", "HELLO WORLD")
+
+
+# Function to check that recordings of short texts decode correctly.
+def check_wav_decoder(texts=WAV_CHECK_TEXTS):
+    """
+    Renders each text as a WAV recording and decodes it again with wav_to_text().
+
+    :return: A list of messages, one per text that did not come back correctly.
+    """
+    failures = []
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, 'check.wav')
+        for text in texts:
+            main.save_morse_wav(filename, main.text_to_morse(text))
+            decoded = main.wav_to_text(filename)
+            if decoded != text:
+                failures.append(f"recording of {text!r}: decoded {decoded!r}")
+    return failures
+
+
+# Function to compare the results with a stored baseline.
+def find_regressions(results, baseline, threshold):
+    """
+    Lists every result that is slower, or uses more memory, than the baseline by more than the threshold.
+
+    :param results: The new results, keyed by 'size/mix/path'.
+    :param baseline: The stored results, in the same form.
+    :param threshold: The allowed change, for example 0.2 for 20%.
+    :return: A list of messages, one per regression.
+    """
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if result["chars_per_sec"] < old["chars_per_sec"] * (1 - threshold):
+            regressions.append(f"{key}: {result['chars_per_sec']:,.0f} chars/s, baseline {old['chars_per_sec']:,.0f} chars/s")
+        if result["peak_memory"] > old["peak_memory"] * (1 + threshold) + 64 * 1024:
+            regressions.append(f"{key}: peak memory {result['peak_memory'] / 1e6:.2f} MB, baseline {old['peak_memory'] / 1e6:.2f} MB")
+    return regressions
+
+
+# Main function for the benchmark.
+def main_benchmark(argv=None):
+    """
+    Runs the benchmark and prints a table of the results.
+
+    :param argv: The command-line arguments (defaults to sys.argv).
+    :return: The exit code (1 if a regression was found).
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Morse code encode, decode and sound paths.")
+    parser.add_argument("--sizes", nargs="+", choices=list(CORPUS_SIZES), default=["small", "medium"], help="text sizes to test")
+    parser.add_argument("--mixes", nargs="+", choices=list(CORPUS_MIXES), default=list(CORPUS_MIXES), help="character mixes to test")
+    parser.add_argument("--paths", nargs="+", choices=list(PATHS), default=list(PATHS), help="code paths to test")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (the best one counts)")
+    parser.add_argument("--seed", type=int, default=1234, help="seed for the generated texts")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare the results with this baseline JSON file")
+    parser.add_argument("--save-baseline", help="store the results as a new baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression against the baseline (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    paths = list(args.paths)
+    if main.np is None and "render" in paths:
+        print("NumPy is not installed, skipping the 'render' path.")
+        paths.remove("render")
+
+    # Make sure the binary format round-trips, and short recordings decode, before timing anything.
+    failures = []
+    for text in ("a", "a b", "a b ", "  a  b", *(make_corpus(3_000, mix, args.seed) for mix in args.mixes)):
+        failures += check_word_reader(text)
+    if main.np is not None:
+        failures += check_wav_decoder()
+    if failures:
+        print(f"{len(failures)} check(s) failed:")
+        for message in failures[:20]:
+            print(f"  {message}")
+        return 1
+
+    results = {}
+    print(f"{'size':<8}{'mix':<10}{'path':<15}{'chars/s':>15}{'symbols/s':>15}{'peak MB':>10}")
+    for size in args.sizes:
+        for mix in args.mixes:
+            text = make_corpus(CORPUS_SIZES[size], mix, args.seed)
+            morse_code = main.text_to_morse(text)
+            for path in paths:
+                result = measure(path, text, morse_code, args.repeat)
+                results[f"{size}/{mix}/{path}"] = result
+                print(f"{size:<8}{mix:<10}{path:<15}{result['chars_per_sec']:>15,.0f}"
+                      f"{result['symbols_per_sec']:>15,.0f}{result['peak_memory'] / 1e6:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Saved baseline to {args.save_baseline}.")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}.")
+    return 0
+
+
+# Run the benchmark if this file is executed directly.
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
@@ -1,5 +1,19 @@
+import io  # Importing io to build sound files in memory.
 import os  # Importing the os module to perform file-related operations.
-import winsound  # Importing winsound to play sounds for Morse code (Windows-specific feature).
+import struct  # Importing struct to read and write the header of binary Morse files.
+from bisect import bisect_left  # Importing bisect_left to search the index of binary Morse files.
+import wave  # Importing wave to write Morse code sound as WAV audio.
+from functools import lru_cache  # Importing lru_cache to remember the rendered sound pieces.
+
+try:
+    import winsound  # Importing winsound to play sounds for Morse code (Windows-specific feature).
+except ImportError:
+    winsound = None  # winsound only exists on Windows, so the converter still works elsewhere.
+
+try:
+    import numpy as np  # Importing NumPy to render Morse code sound quickly (optional).
+except ImportError:
+    np = None  # Rendering sound needs NumPy, everything else works without it.
 
 # Step 1: Creating a dictionary to map letters, numbers, and symbols to their Morse code representations.
 # Each key in the dictionary is a character (like 'A', '1', ',') and its corresponding value is the Morse code.
@@ -23,6 +37,177 @@ MORSE_CODE_DICT = {
 # For example, '.-' (Morse code for 'A') will now map back to 'A'.
 TEXT_DICT = {value: key for key, value in MORSE_CODE_DICT.items()}
 
+# Step 3: The number of characters read from a file at a time when converting it in chunks.
+# One megabyte of text keeps the memory use small no matter how large the file is.
+CHUNK_SIZE = 1024 * 1024
+
+
+# A dictionary used as a translation table for str.translate().
+# str.translate() looks up every character of the string in this table by its code point.
+class _MorseTable(dict):
+    """
+    Translation table that maps code points to their Morse code (followed by a space).
+    Characters that have no Morse code are translated to the fallback ('? ') and remembered, up to a limit.
+    """
+
+    MAX_SIZE = 4096  # Stop remembering unknown keys after this many entries, so untrusted input cannot grow the table.
+
+    def __init__(self, mapping, fallback="? "):
+        super().__init__(mapping)
+        self.fallback = fallback
+
+    def __missing__(self, code_point):
+        # Remember the fallback so the next lookup of the same character is a plain dict hit.
+        if len(self) < self.MAX_SIZE:
+            self[code_point] = self.fallback
+        return self.fallback
+
+
+# Step 4: Precomputing the translation table for encoding.
+# Every character maps to its Morse code plus the separating space, so a whole string can be
+# encoded with a single call to str.translate() instead of a Python loop over the characters.
+MORSE_TRANSLATION_TABLE = _MorseTable({ord(char): code + " " for char, code in MORSE_CODE_DICT.items()})
+
+
+# Function to build the Morse code tree used for decoding.
+def build_morse_tree():
+    """
+    Builds a binary tree of all Morse codes, stored in a flat list.
+    The root is at index 0. From the node at index i, a dot leads to index 2*i + 1 and a dash to 2*i + 2.
+    Each node holds the character whose code ends there, or None.
+
+    :return: The tree as a list.
+    """
+    depth = max(len(code) for code in TEXT_DICT if code != '/')  # The longest code decides the depth.
+    tree = [None] * (2 ** (depth + 1) - 1)  # A complete binary tree with that many levels.
+
+    for char, code in MORSE_CODE_DICT.items():
+        if code == '/':  # The word separator is not made of dots and dashes.
+            continue
+        index = 0
+        for symbol in code:
+            index = 2 * index + (1 if symbol == '.' else 2)  # Walk down to the dot or dash child.
+        tree[index] = char
+
+    return tree
+
+
+# Step 5: Building the decoding tree once, when the program starts.
+MORSE_TREE = build_morse_tree()
+MORSE_TREE_DEPTH = len(MORSE_TREE).bit_length() - 1  # The length of the longest code (7).
+
+
+# Function to decode a single Morse code by walking down the tree.
+def morse_tree_lookup(code):
+    """
+    Finds the character for a single Morse code by following its dots and dashes through MORSE_TREE.
+
+    :param code: A Morse code such as '.-', or '/' for the space between words.
+    :return: The decoded character, or '?' if the code is not valid.
+    """
+    if code == '/':
+        return ' '
+    if not code or len(code) > MORSE_TREE_DEPTH:
+        return '?'
+
+    index = 0
+    for symbol in code:
+        if symbol == '.':
+            index = 2 * index + 1
+        elif symbol == '-':
+            index = 2 * index + 2
+        else:
+            return '?'  # Anything other than a dot or dash cannot be decoded.
+    return MORSE_TREE[index] or '?'
+
+
+# A dictionary that decodes whole Morse codes in one lookup.
+class _TextTable(dict):
+    """
+    Maps every Morse code in MORSE_TREE to its character (as str keys or as bytes keys).
+    Codes that are not in the table are decoded by walking the tree and remembered, up to a limit.
+    """
+
+    MAX_SIZE = 4096  # Stop remembering unknown codes after this many entries.
+
+    def __init__(self, as_bytes=False):
+        super().__init__()
+        self.as_bytes = as_bytes
+        self._add_codes(0, '')  # Fill the table from the tree, starting at the root.
+        self[self._key('/')] = ' '  # The word separator decodes to a space.
+
+    def _key(self, code):
+        return code.encode('ascii') if self.as_bytes else code
+
+    def _add_codes(self, index, code):
+        if index >= len(MORSE_TREE):
+            return
+        if MORSE_TREE[index] is not None:
+            self[self._key(code)] = MORSE_TREE[index]
+        self._add_codes(2 * index + 1, code + '.')  # The dot branch.
+        self._add_codes(2 * index + 2, code + '-')  # The dash branch.
+
+    def __missing__(self, code):
+        char = morse_tree_lookup(code.decode('latin-1') if self.as_bytes else code)
+        if len(self) < self.MAX_SIZE:
+            self[code] = char
+        return char
+
+
+# Step 6: Precomputing the decoding tables for text (str) and for raw file data (bytes).
+MORSE_DECODE_TABLE = _TextTable()
+MORSE_DECODE_BYTES_TABLE = _TextTable(as_bytes=True)
+
+# Tables for converting many messages in one pass. The messages are joined with BATCH_SEPARATOR,
+# which these tables pass through unchanged, so the result can be split back into messages.
+BATCH_SEPARATOR = '\0'
+MORSE_BATCH_TRANSLATION_TABLE = _MorseTable(MORSE_TRANSLATION_TABLE)
+MORSE_BATCH_TRANSLATION_TABLE[ord(BATCH_SEPARATOR)] = BATCH_SEPARATOR
+MORSE_BATCH_DECODE_TABLE = _TextTable()
+MORSE_BATCH_DECODE_TABLE[BATCH_SEPARATOR] = BATCH_SEPARATOR
+
+# Step 7: Default settings for Morse code sound.
+# At 6 words per minute one dot lasts 200 ms, the same as the old winsound beeps.
+DEFAULT_WPM = 6
+DEFAULT_FREQUENCY = 1000  # The pitch of the beep in Hz.
+DEFAULT_SAMPLE_RATE = 22050  # Audio samples per second.
+AUDIO_BLOCK_SAMPLES = 4 * 1024 * 1024  # About how many samples are rendered at a time.
+
+# How long every Morse symbol sounds, in units (one unit is the length of a dot).
+# Each dot and dash is followed by a one unit gap. The spaces around '/' add up to the
+# standard seven unit gap between words, and a single space to the three unit gap between letters.
+# The entries are (beep units, silent units) for '.', '-', ' ' and '/'.
+MORSE_SYMBOL_UNITS = {'.': (1, 1), '-': (3, 1), ' ': (0, 2), '/': (0, 2)}
+
+# Step 8: The compact binary file format.
+# Every Morse element is stored in 2 bits, written here as a base-4 digit:
+# '0' is a dot, '1' a dash, '2' ends a character and '3' is the space between words.
+# A '2' on its own (a character without elements) stands for an unknown character ('?').
+# The file starts with a header, then the packed elements, then an index with one entry per
+# block of characters, so a reader can jump to any character or word without decoding the rest.
+BINARY_MAGIC = b'MORSEBIN'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<8sHIQQQ')  # magic, version, block size, characters, elements, index position
+BINARY_INDEX_ENTRY = struct.Struct('<QQ')  # first element of the block, word separators before the block
+BINARY_BLOCK_CHARS = 4096  # Characters per index block.
+
+# Tables that turn text characters or Morse codes into base-4 digits, and back.
+_ELEMENT_DIGITS = str.maketrans('.-', '01')
+TEXT_TO_BINARY_TABLE = _MorseTable({ord(char): code.translate(_ELEMENT_DIGITS) + '2'
+                                    for char, code in MORSE_CODE_DICT.items() if char != ' '}, fallback='2')
+TEXT_TO_BINARY_TABLE[ord(' ')] = '3'
+MORSE_TO_BINARY_TABLE = _MorseTable({code: ('3' if char == ' ' else code.translate(_ELEMENT_DIGITS) + '2')
+                                     for code, char in MORSE_DECODE_TABLE.items()}, fallback='2')
+BINARY_TO_TEXT_TABLE = _MorseTable({digits[:-1] if digits != '3' else '3': MORSE_DECODE_TABLE[code]
+                                    for code, digits in MORSE_TO_BINARY_TABLE.items()}, fallback='?')
+BINARY_TO_MORSE_TABLE = _MorseTable({digits[:-1] if digits != '3' else '3': code
+                                     for code, digits in MORSE_TO_BINARY_TABLE.items()}, fallback='?')
+BYTE_TO_DIGITS = [''.join(str((byte >> shift) & 3) for shift in (6, 4, 2, 0)) for byte in range(256)]
+
+# Settings for decoding Morse code from a recording.
+ENVELOPE_WINDOW = 0.005  # The loudness is averaged over 5 ms to smooth out the waves of the beep.
+CALIBRATION_BEEPS = 200  # How many beeps are measured before the dot length is decided.
+
 
 # Function to convert text into Morse code.
 def text_to_morse(text):
@@ -32,20 +217,60 @@ def text_to_morse(text):
     :param text: Input string to convert into Morse code.
     :return: A string containing the Morse code representation of the input text.
     """
-    morse_code = []  # Initialize an empty list to store the Morse code.
+    # Uppercase the text and translate every character through the precomputed table.
+    # Each code ends with a space, so the last one is removed to keep the spaces only between codes.
+    return text.upper().translate(MORSE_TRANSLATION_TABLE)[:-1]
+
+
+# Function to read a file piece by piece.
+def read_chunks(file, chunk_size=CHUNK_SIZE):
+    """
+    Reads an open file in chunks so that large files never have to fit in memory.
+
+    :param file: An open file object (text or binary).
+    :param chunk_size: The number of characters (or bytes) to read at a time.
+    :return: A generator that yields the chunks one by one.
+    """
+    while True:
+        chunk = file.read(chunk_size)  # Read the next piece of the file.
+        if not chunk:  # An empty chunk means the end of the file was reached.
+            return
+        yield chunk
+
+
+# Function to convert a stream of text into a stream of Morse code.
+def text_to_morse_stream(chunks):
+    """
+    Converts text into Morse code one chunk at a time.
+    Joining everything this generator yields gives the same result as text_to_morse() on the whole text.
+
+    :param chunks: An iterable of text strings (for example read_chunks(file)).
+    :return: A generator that yields pieces of the Morse code.
+    """
+    pending_space = False  # Whether a separating space is still owed before the next code.
+
+    for chunk in chunks:
+        morse_code = chunk.upper().translate(MORSE_TRANSLATION_TABLE)
+        if not morse_code:  # Skip empty chunks.
+            continue
+        # Hold back the trailing space, because we do not know yet if another code will follow it.
+        yield (" " if pending_space else "") + morse_code[:-1]
+        pending_space = True
 
-    # Loop through each character in the input text (converted to uppercase).
-    for char in text.upper():
-        # Check if the character exists in the Morse code dictionary.
-        if char in MORSE_CODE_DICT:
-            # If it exists, append the corresponding Morse code to the list.
-            morse_code.append(MORSE_CODE_DICT[char])
-        else:
-            # If it doesn't exist, append a '?' to indicate an unsupported character.
-            morse_code.append("?")
 
-    # Join the list of Morse code with spaces and return it as a single string.
-    return ' '.join(morse_code)
+# Function to convert a whole text file into a Morse code file.
+def text_file_to_morse_file(input_filename, output_filename, chunk_size=CHUNK_SIZE):
+    """
+    Converts a text file into Morse code and writes the result to another file.
+    The file is read and written in chunks, so the memory use stays the same for any file size.
+
+    :param input_filename: Name of the text file to convert.
+    :param output_filename: Name of the file to write the Morse code to.
+    :param chunk_size: The number of characters to convert at a time.
+    """
+    with open(input_filename, 'r') as input_file, open(output_filename, 'w') as output_file:
+        for morse_code in text_to_morse_stream(read_chunks(input_file, chunk_size)):
+            output_file.write(morse_code)  # Write each piece as soon as it is ready.
 
 
 # Function to convert Morse code back into text.
@@ -56,55 +281,722 @@ def morse_to_text(morse_code):
     :param morse_code: Input Morse code string to convert into text.
     :return: A string containing the text representation of the Morse code.
     """
-    text = []  # Initialize an empty list to store the decoded text.
+    # Split the Morse code by whitespace and decode every code with one table lookup.
+    # map() runs the lookups without a Python loop, and unknown codes become '?'.
+    return ''.join(map(MORSE_DECODE_TABLE.__getitem__, morse_code.split()))
+
+
+# Function to convert a stream of Morse code into a stream of text.
+def morse_to_text_stream(chunks):
+    """
+    Converts Morse code into text one chunk at a time.
+    A code that is cut in half at the end of a chunk is kept and finished with the next chunk.
+
+    :param chunks: An iterable of Morse code pieces, either str or bytes (for example read_chunks(file)).
+    :return: A generator that yields pieces of the decoded text.
+    """
+    carry = None  # The unfinished code at the end of the previous chunk.
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if carry is None:
+            # Pick the table that matches the type of the input (str or bytes).
+            table = MORSE_DECODE_BYTES_TABLE if isinstance(chunk, bytes) else MORSE_DECODE_TABLE
+            carry = chunk[:0]
+        chunk = carry + chunk
+        codes = chunk.split()
+
+        if chunk[-1:].isspace():
+            carry = chunk[:0]  # The chunk ended between two codes.
+        else:
+            # The last code may continue in the next chunk. It can never be longer than the
+            # longest valid code plus one, so cutting it there keeps it invalid and the memory small.
+            carry = codes.pop()[:MORSE_TREE_DEPTH + 1]
+
+        if codes:
+            yield ''.join(map(table.__getitem__, codes))
+
+    if carry:
+        yield table[carry]  # Decode the last code once the stream has ended.
+
+
+# Function to convert many texts into Morse code at once.
+def text_to_morse_batch(texts):
+    """
+    Converts a list of texts into Morse code with a single pass through the translation table.
+    This is much faster than calling text_to_morse() for many short texts.
+
+    :param texts: A list of text strings.
+    :return: A list with the Morse code of each text.
+    """
+    if not texts:
+        return []
+    if any(BATCH_SEPARATOR in text for text in texts):
+        return [text_to_morse(text) for text in texts]  # The separator cannot be used, convert one by one.
+    joined = BATCH_SEPARATOR.join(texts).upper().translate(MORSE_BATCH_TRANSLATION_TABLE)
+    return [morse_code[:-1] for morse_code in joined.split(BATCH_SEPARATOR)]  # Drop each trailing space.
+
+
+# Function to convert many Morse code messages into text at once.
+def morse_to_text_batch(morse_codes):
+    """
+    Converts a list of Morse code strings into text with a single pass through the decoding table.
+
+    :param morse_codes: A list of Morse code strings.
+    :return: A list with the text of each Morse code string.
+    """
+    if not morse_codes:
+        return []
+    if any(BATCH_SEPARATOR in morse_code for morse_code in morse_codes):
+        return [morse_to_text(morse_code) for morse_code in morse_codes]
+    codes = f" {BATCH_SEPARATOR} ".join(morse_codes).split()
+    return ''.join(map(MORSE_BATCH_DECODE_TABLE.__getitem__, codes)).split(BATCH_SEPARATOR)
+
+
+# Function to convert a whole Morse code file into a text file.
+def morse_file_to_text_file(input_filename, output_filename, chunk_size=CHUNK_SIZE):
+    """
+    Decodes a Morse code file and writes the text to another file.
+    The file is read as raw bytes and decoded in chunks, so the memory use stays the same for any file size.
+
+    :param input_filename: Name of the Morse code file to decode.
+    :param output_filename: Name of the file to write the text to.
+    :param chunk_size: The number of bytes to decode at a time.
+    """
+    with open(input_filename, 'rb') as input_file, open(output_filename, 'w') as output_file:
+        for text in morse_to_text_stream(read_chunks(input_file, chunk_size)):
+            output_file.write(text)  # Write each piece as soon as it is ready.
+
+
+# Function to make sure NumPy is available before working with sound.
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for Morse code sound. Install it with 'pip install numpy'.")
+
+
+# Function to render the sound of each Morse symbol once.
+@lru_cache(maxsize=32)
+def morse_sound_segments(wpm=DEFAULT_WPM, frequency=DEFAULT_FREQUENCY, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    Renders the sound of every Morse symbol for the given settings.
+    The result is cached, so each combination of settings is rendered only once.
+
+    :param wpm: Speed in words per minute.
+    :param frequency: Pitch of the beep in Hz.
+    :param sample_rate: Audio samples per second.
+    :return: A tuple (segments, lengths, symbol_ids). Row i of segments holds the samples of symbol i
+             padded with zeros, lengths[i] is how many of them are used, and symbol_ids maps a byte
+             value to its row (the last row is an empty segment for characters that make no sound).
+    """
+    _require_numpy()
+    unit = int(round(sample_rate * 1.2 / wpm))  # The standard "PARIS" timing: a dot lasts 1.2 / wpm seconds.
+    longest = max(beep + silence for beep, silence in MORSE_SYMBOL_UNITS.values()) * unit
+
+    segments = np.zeros((len(MORSE_SYMBOL_UNITS) + 1, longest), dtype=np.int16)
+    lengths = np.zeros(len(MORSE_SYMBOL_UNITS) + 1, dtype=np.int64)
+    symbol_ids = np.full(256, len(MORSE_SYMBOL_UNITS), dtype=np.intp)
+
+    for row, (symbol, (beep, silence)) in enumerate(MORSE_SYMBOL_UNITS.items()):
+        symbol_ids[ord(symbol)] = row
+        lengths[row] = (beep + silence) * unit
+        if beep:
+            time = np.arange(beep * unit) / sample_rate
+            tone = np.sin(2 * np.pi * frequency * time)
+            # Fade the beep in and out over 5 ms so it does not click.
+            ramp = min(int(sample_rate * 0.005), len(tone) // 2)
+            if ramp:
+                fade = 0.5 - 0.5 * np.cos(np.linspace(0, np.pi, ramp))
+                tone[:ramp] *= fade
+                tone[-ramp:] *= fade[::-1]
+            segments[row, :len(tone)] = (tone * 16000).astype(np.int16)
+
+    # The cached arrays are shared, so make sure nobody changes them by accident.
+    for array in (segments, lengths, symbol_ids):
+        array.setflags(write=False)
+    return segments, lengths, symbol_ids
+
+
+# Function to turn Morse code into sound samples, piece by piece.
+def morse_to_pcm_stream(chunks, wpm=DEFAULT_WPM, frequency=DEFAULT_FREQUENCY, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    Renders Morse code into 16-bit PCM sound samples.
+    The samples are built by picking the precomputed segment of every symbol with NumPy indexing,
+    so there is no Python loop over the samples or over the symbols.
+
+    :param chunks: An iterable of Morse code strings (or a single string).
+    :param wpm: Speed in words per minute.
+    :param frequency: Pitch of the beep in Hz.
+    :param sample_rate: Audio samples per second.
+    :return: A generator that yields NumPy int16 arrays of samples.
+    """
+    segments, lengths, symbol_ids = morse_sound_segments(wpm, frequency, sample_rate)
+    used = np.arange(segments.shape[1]) < lengths[:, None]  # Which samples of each row are real sound.
+    symbols_per_block = max(1, AUDIO_BLOCK_SAMPLES // segments.shape[1])
+
+    if isinstance(chunks, str):
+        chunks = [chunks]
+
+    for chunk in chunks:
+        codes = np.frombuffer(chunk.encode('ascii', 'replace'), dtype=np.uint8)
+        # Render a limited number of symbols at a time so the memory use stays small.
+        for start in range(0, len(codes), symbols_per_block):
+            ids = symbol_ids[codes[start:start + symbols_per_block]]
+            samples = segments[ids][used[ids]]  # Pick the segments and drop their padding.
+            if len(samples):
+                yield samples
+
+
+# Function to turn Morse code into sound samples all at once.
+def morse_to_pcm(morse_code, wpm=DEFAULT_WPM, frequency=DEFAULT_FREQUENCY, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    Renders Morse code into a single array of 16-bit PCM sound samples.
+
+    :param morse_code: Input Morse code string.
+    :return: A NumPy int16 array with the samples.
+    """
+    _require_numpy()
+    blocks = list(morse_to_pcm_stream(morse_code, wpm, frequency, sample_rate))
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int16)
+
+
+# Function to save Morse code as a WAV sound file.
+def save_morse_wav(output, morse_code, wpm=DEFAULT_WPM, frequency=DEFAULT_FREQUENCY, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    Renders Morse code and writes it as a mono 16-bit WAV file.
+    The sound is written block by block, so long Morse code never has to fit in memory as audio.
+
+    :param output: Name of the WAV file, or a seekable binary file object.
+    :param morse_code: A Morse code string, or an iterable of Morse code chunks.
+    """
+    with wave.open(output, 'wb') as wav_file:
+        wav_file.setnchannels(1)  # Mono sound.
+        wav_file.setsampwidth(2)  # 16 bits per sample.
+        wav_file.setframerate(sample_rate)
+        for samples in morse_to_pcm_stream(morse_code, wpm, frequency, sample_rate):
+            wav_file.writeframes(samples.astype('<i2', copy=False).tobytes())
+
+
+# Function to find where the sound samples are stored in a WAV file.
+def _wav_data_layout(filename):
+    """
+    Reads the header of a WAV file and finds the position of its sound samples.
+
+    :param filename: Name of the WAV file.
+    :return: A tuple (channels, sample_width, sample_rate, data_offset, data_size).
+    """
+    with wave.open(filename, 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        sample_rate = wav_file.getframerate()
 
-    # Split the Morse code string by spaces to get individual Morse code symbols.
-    for code in morse_code.split():
-        # Check if the Morse code exists in the reverse dictionary.
-        if code in TEXT_DICT:
-            # If it exists, append the corresponding character to the list.
-            text.append(TEXT_DICT[code])
+    # Walk through the chunks of the RIFF file until the 'data' chunk is found.
+    with open(filename, 'rb') as file:
+        file.seek(12)  # Skip 'RIFF', the file size and 'WAVE'.
+        while True:
+            header = file.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{filename} has no sound data.")
+            chunk_id, chunk_size = header[:4], int.from_bytes(header[4:], 'little')
+            if chunk_id == b'data':
+                return channels, sample_width, sample_rate, file.tell(), chunk_size
+            file.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)  # Chunks are padded to an even size.
+
+
+# Function to measure the loudness of a recording, block by block.
+def _wav_envelope_blocks(samples, window, block_frames):
+    """
+    Turns raw samples into a smooth loudness curve (the envelope).
+    The samples are rectified and averaged over a short window, one block at a time.
+    The end of each block is kept so the average continues smoothly into the next block.
+
+    :param samples: A memory-mapped NumPy array of shape (frames, channels).
+    :param window: Number of samples to average over.
+    :param block_frames: Number of frames to process at a time.
+    :return: A generator that yields the envelope of each block as a float array.
+    """
+    history = np.zeros(window - 1)  # The last samples of the previous block.
+    for start in range(0, len(samples), block_frames):
+        block = samples[start:start + block_frames].astype(np.float64)
+        if samples.dtype == np.uint8:
+            block -= 128  # 8-bit WAV samples are unsigned and centred on 128.
+        loudness = np.abs(block.mean(axis=1))  # Mix the channels together and rectify.
+        extended = np.concatenate((history, loudness))
+        totals = np.concatenate(([0.0], np.cumsum(extended)))
+        yield (totals[window:] - totals[:-window]) / window  # Moving average over the window.
+        history = extended[len(extended) - window + 1:]
+
+
+# Function to work out how long one Morse unit (a dot) lasts in a recording.
+def _estimate_unit(beeps, gaps):
+    """
+    Estimates the length of a dot from the measured beeps and gaps.
+    If there are short and long beeps, they are split into dots and dashes (a dash is three units).
+    If all beeps are alike, they are compared with the shortest gaps, which are 1 unit (inside a letter),
+    3 units (between letters) or 7 units (between words) long. For example, 'T T' has dashes with
+    7-unit gaps and 'E E E' has dots with 7-unit gaps.
+    Dots with 1-unit gaps ('I') and dashes with 3-unit gaps ('TT') sound alike; unless a longer gap
+    shows which one it is, they are read as dots.
+
+    :param beeps: NumPy array with the lengths of the beeps, in samples.
+    :param gaps: NumPy array with the lengths of the silences between beeps, in samples.
+    :return: The length of one unit, in samples.
+    """
+    shortest, longest = beeps.min(), beeps.max()
+    if longest > 2 * shortest:
+        split = (shortest + longest) / 2
+        for _ in range(10):  # Move the split between the two groups until it settles (1-D k-means).
+            dots, dashes = beeps[beeps < split], beeps[beeps >= split]
+            split = (dots.mean() + dashes.mean()) / 2
+        return (dots.mean() + dashes.mean() / 3) / 2
+
+    beep = np.median(beeps)
+    if not len(gaps):
+        return beep  # A single beep is most likely a dot.
+    short_gaps, long_gaps = gaps[gaps < 2 * gaps.min()], gaps[gaps >= 2 * gaps.min()]
+    gap = np.median(short_gaps)
+    ratio = gap / beep  # 1/3, 1, 7/3, 3 or 7 (the ratios are split halfway between these)
+    if ratio < 2 / 3:
+        return gap  # Dashes with 1-unit gaps, like 'M' or 'O'
+    if ratio < 5 / 3:
+        # Dots with 1-unit gaps, or dashes with 3-unit gaps. Only dashes have longer gaps 7/3 times as long (words).
+        return beep / 3 if len(long_gaps) and np.median(long_gaps) < 8 / 3 * gap else beep
+    if ratio < 8 / 3:
+        return beep / 3  # Dashes with 7-unit gaps, like 'T T'
+    return beep  # Dots with 3-unit or 7-unit gaps, like 'EE' or 'E E E'
+
+
+# Function to turn a list of beeps and silences into Morse code.
+def _runs_to_morse(is_beep, lengths, unit):
+    """
+    Converts measured beeps and silences into dots, dashes and separators.
+
+    :param is_beep: Boolean NumPy array, True for a beep and False for a silence.
+    :param lengths: NumPy array with the length of each beep or silence, in samples.
+    :param unit: The length of one unit, in samples.
+    :return: A Morse code string.
+    """
+    short = lengths < 2 * unit
+    symbols = np.where(is_beep, np.where(short, '.', '-'),
+                       np.where(short, '', np.where(lengths < 5 * unit, ' ', ' / ')))
+    return ''.join(symbols.tolist())
+
+
+# Function to split a recording into beeps and silences, block by block.
+def _wav_runs(samples, window, block_frames, threshold):
+    """
+    Finds the beeps and silences of a recording and measures their lengths (run-length encoding).
+    A run that is still going on at the end of a block is finished in the next block.
+
+    :param samples: A memory-mapped NumPy array of shape (frames, channels).
+    :param window: Number of samples the envelope is averaged over.
+    :param block_frames: Number of frames to process at a time.
+    :param threshold: Envelope level above which the sound counts as a beep.
+
+    :return: A generator that yields (is_beep, lengths) pairs of NumPy arrays.
+    """
+    current, current_length = False, 0  # The run that is still going on at the end of a block.
+
+    for envelope in _wav_envelope_blocks(samples, window, block_frames):
+        on = envelope > threshold
+        edges = np.flatnonzero(on[1:] != on[:-1]) + 1  # Where the sound switches on or off.
+        starts = np.concatenate(([0], edges))
+        lengths = np.diff(np.concatenate((starts, [len(on)])))
+        values = on[starts]
+
+        # The first run of this block continues the unfinished run of the previous block.
+        if values[0] == current:
+            lengths[0] += current_length
         else:
-            # If it doesn't exist, append a '?' to indicate an unsupported Morse code.
-            text.append("?")
+            values = np.concatenate(([current], values))
+            lengths = np.concatenate(([current_length], lengths))
+
+        # Noise makes the envelope flicker around the threshold at the edges of a beep.
+        # Runs shorter than the smoothing window are flipped, which joins them with their neighbours.
+        glitch = lengths < window
+        glitch[0] = glitch[-1] = False  # The first and last runs continue in other blocks.
+        if glitch.any():
+            values = values ^ glitch
+            keep = np.flatnonzero(np.concatenate(([True], values[1:] != values[:-1])))
+            values, lengths = values[keep], np.add.reduceat(lengths, keep)
+        current, current_length = bool(values[-1]), int(lengths[-1])
+        yield values[:-1], lengths[:-1]  # Keep the last run open.
+
+    if current:
+        yield np.array([True]), np.array([current_length])  # A final silence is not part of the message.
+
+
+# Function to read Morse code from a WAV recording.
+def wav_to_morse_stream(filename, block_frames=AUDIO_BLOCK_SAMPLES):
+    """
+    Decodes the beeps in a WAV recording into Morse code.
+    The file is memory-mapped and processed in blocks: the envelope is found with NumPy
+    (rectify, smooth, threshold), split into beeps and silences (run lengths), and the
+    dot length is estimated from the first beeps. Memory use does not depend on the length of the recording.
+
+    :param filename: Name of the WAV file.
+    :param block_frames: Number of frames to process at a time.
+    :return: A generator that yields pieces of Morse code.
+    """
+    _require_numpy()
+    channels, sample_width, sample_rate, offset, size = _wav_data_layout(filename)
+    dtypes = {1: np.uint8, 2: np.dtype('<i2'), 4: np.dtype('<i4')}
+    if sample_width not in dtypes:
+        raise ValueError(f"{sample_width * 8}-bit WAV files are not supported.")
+    frames = size // (sample_width * channels)
+    if frames == 0:
+        return
+    samples = np.memmap(filename, dtype=dtypes[sample_width], mode='r', offset=offset, shape=(frames, channels))
+    window = max(1, int(sample_rate * ENVELOPE_WINDOW))
+
+    # First pass: find the loudest point, so the beeps can be told apart from the silence.
+    peak = max(envelope.max() for envelope in _wav_envelope_blocks(samples, window, block_frames))
+    if peak <= 0:
+        return
+
+    # Second pass: measure the beeps and silences and turn them into Morse code.
+    unit = None  # The length of a dot, once enough beeps have been measured.
+    pending_values, pending_lengths = [], []  # Runs measured before the dot length is known.
+    started = False  # Silence before the first beep is ignored.
+
+    for values, lengths in _wav_runs(samples, window, block_frames, peak / 2):
+        if not started:
+            beeps = np.flatnonzero(values)
+            if not len(beeps):
+                continue
+            values, lengths, started = values[beeps[0]:], lengths[beeps[0]:], True
 
-    # Join the list of characters into a single string and return it.
-    return ''.join(text)
+        if unit is None:
+            pending_values.append(values)
+            pending_lengths.append(lengths)
+            if sum(np.count_nonzero(v) for v in pending_values) < CALIBRATION_BEEPS:
+                continue
+            values, lengths = np.concatenate(pending_values), np.concatenate(pending_lengths)
+            unit = _estimate_unit(lengths[values], lengths[~values])
+
+        yield _runs_to_morse(values, lengths, unit)
+
+    # A short recording may end before enough beeps were measured.
+    if unit is None and pending_values:
+        values, lengths = np.concatenate(pending_values), np.concatenate(pending_lengths)
+        yield _runs_to_morse(values, lengths, _estimate_unit(lengths[values], lengths[~values]))
+
+
+# Function to decode the text of a Morse code WAV recording.
+def wav_to_text(filename):
+    """
+    Decodes a Morse code WAV recording into text.
+
+    :param filename: Name of the WAV file.
+    :return: The decoded text.
+    """
+    return ''.join(morse_to_text_stream(wav_to_morse_stream(filename)))
 
 
 # Function to play Morse code as sound.
 def play_morse(morse_code):
     """
-    Plays the given Morse code as sound using the winsound module.
-    Dots are short beeps, dashes are long beeps, and spaces are pauses.
+    Plays the given Morse code as sound.
+    The sound is rendered into a WAV file in memory and played with winsound on Windows.
+    On other systems it is saved to 'morse_code.wav' so it can be played with any audio player.
 
     :param morse_code: Input Morse code string to play as sound.
     """
-    for symbol in morse_code:
-        if symbol == '.':
-            # Play a short beep for a dot.
-            winsound.Beep(1000, 200)  # Frequency: 1000 Hz, Duration: 200 ms
-        elif symbol == '-':
-            # Play a long beep for a dash.
-            winsound.Beep(1000, 600)  # Frequency: 1000 Hz, Duration: 600 ms
-        elif symbol == ' ':
-            # Pause briefly between letters.
-            winsound.Beep(37, 300)  # A very low frequency sound to act as a pause.
-        elif symbol == '/':
-            # Pause longer between words.
-            winsound.Beep(37, 600)  # A very low frequency sound to act as a pause.
+    if winsound is None:
+        save_morse_wav("morse_code.wav", morse_code)
+        print("Sound playback needs Windows. Saved the sound to morse_code.wav instead.")
+        return
+
+    buffer = io.BytesIO()
+    save_morse_wav(buffer, morse_code)
+    winsound.PlaySound(buffer.getvalue(), winsound.SND_MEMORY)  # Play the whole sound in one call.
+
+
+# Function to pack base-4 digits into bytes.
+def _pack_digits(digits):
+    """
+    Packs a string of base-4 digits into bytes, four digits (2 bits each) per byte.
+    The last byte is padded with zeros.
+    """
+    digits += '0' * (-len(digits) % 4)
+    # int() with base 4 and to_bytes() do the packing in C, without a loop over the digits.
+    return int(digits, 4).to_bytes(len(digits) // 4, 'big') if digits else b''
+
+
+# Function to unpack bytes into base-4 digits.
+def _unpack_digits(data):
+    """
+    Unpacks bytes into a string of base-4 digits, four digits per byte.
+    """
+    return ''.join(map(BYTE_TO_DIGITS.__getitem__, data))
+
+
+# Function to split base-4 digits into one piece per character.
+def _split_digit_characters(digits):
+    """
+    Splits base-4 digits into the elements of each character. A word separator becomes '3'.
+    The digits must end at the end of a character.
+    """
+    return digits.replace('3', '32').split('2')[:-1]  # Give the separator an end mark too, then split.
+
+
+# Function to write the binary Morse format.
+def write_morse_binary(file, blocks):
+    """
+    Writes the binary Morse format to an open binary file.
+    The blocks are packed and written one by one, and the index is written at the end,
+    so the whole message never has to fit in memory.
+
+    :param file: An open, seekable binary file.
+    :param blocks: An iterable of (digits, characters) pairs, one per block of BINARY_BLOCK_CHARS
+                   characters (only the last block may be shorter).
+    """
+    start = file.tell()
+    file.write(b'\0' * BINARY_HEADER.size)  # Reserve space for the header, it is filled in at the end.
+
+    index = []  # One (element offset, word separators before) entry per block.
+    elements = characters = separators = 0
+    leftover = ''  # Digits that did not fill a whole byte yet.
+    for digits, count in blocks:
+        index.append(BINARY_INDEX_ENTRY.pack(elements, separators))
+        elements += len(digits)
+        characters += count
+        separators += digits.count('3')
+        digits = leftover + digits
+        cut = len(digits) - len(digits) % 4
+        file.write(_pack_digits(digits[:cut]))
+        leftover = digits[cut:]
+    file.write(_pack_digits(leftover))
+
+    index_position = file.tell() - start
+    file.write(b''.join(index))
+    end = file.tell()
+    file.seek(start)
+    file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, BINARY_BLOCK_CHARS, characters, elements, index_position))
+    file.seek(end)
+
+
+# Function to turn text into blocks of base-4 digits.
+def text_to_binary_blocks(chunks):
+    """
+    Converts text into blocks of base-4 digits for write_morse_binary().
+
+    :param chunks: An iterable of text strings (or a single string).
+    :return: A generator that yields (digits, characters) pairs.
+    """
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    pending = ''  # Text that does not fill a whole block yet.
+    for chunk in chunks:
+        pending += chunk.upper()
+        full = len(pending) - len(pending) % BINARY_BLOCK_CHARS
+        for start in range(0, full, BINARY_BLOCK_CHARS):
+            yield pending[start:start + BINARY_BLOCK_CHARS].translate(TEXT_TO_BINARY_TABLE), BINARY_BLOCK_CHARS
+        pending = pending[full:]
+    if pending:
+        yield pending.translate(TEXT_TO_BINARY_TABLE), len(pending)
+
+
+# Function to turn Morse code into blocks of base-4 digits.
+def morse_to_binary_blocks(morse_code):
+    """
+    Converts a Morse code string into blocks of base-4 digits for write_morse_binary().
+    Every code (including '/' and '?') counts as one character.
+
+    :param morse_code: Input Morse code string.
+    :return: A generator that yields (digits, characters) pairs.
+    """
+    codes = morse_code.split()
+    for start in range(0, len(codes), BINARY_BLOCK_CHARS):
+        block = codes[start:start + BINARY_BLOCK_CHARS]
+        yield ''.join(map(MORSE_TO_BINARY_TABLE.__getitem__, block)), len(block)
+
+
+# Function to convert Morse code into the binary format.
+def morse_to_binary(morse_code):
+    """
+    Converts a Morse code string into the bytes of the binary Morse format.
+
+    :param morse_code: Input Morse code string.
+    :return: The binary file content as bytes.
+    """
+    buffer = io.BytesIO()
+    write_morse_binary(buffer, morse_to_binary_blocks(morse_code))
+    return buffer.getvalue()
+
+
+# Function to convert text into the binary format.
+def text_to_binary(text):
+    """
+    Converts text directly into the bytes of the binary Morse format.
+
+    :param text: Input text.
+    :return: The binary file content as bytes.
+    """
+    buffer = io.BytesIO()
+    write_morse_binary(buffer, text_to_binary_blocks(text))
+    return buffer.getvalue()
+
+
+# Function to convert a text file into a binary Morse file.
+def text_file_to_binary_file(input_filename, output_filename, chunk_size=CHUNK_SIZE):
+    """
+    Converts a text file into a binary Morse file, reading the text in chunks.
+
+    :param input_filename: Name of the text file to convert.
+    :param output_filename: Name of the binary file to write.
+    :param chunk_size: The number of characters to convert at a time.
+    """
+    with open(input_filename, 'r') as input_file, open(output_filename, 'wb') as output_file:
+        write_morse_binary(output_file, text_to_binary_blocks(read_chunks(input_file, chunk_size)))
+
+
+# Function to read the header of the binary format.
+def _read_binary_header(data):
+    magic, version, block_chars, characters, elements, index_position = BINARY_HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not a binary Morse file.")
+    return block_chars, characters, elements, index_position
+
+
+# Function to decode all the characters of the binary format.
+def _binary_characters(data):
+    block_chars, characters, elements, index_position = _read_binary_header(data)
+    digits = _unpack_digits(data[BINARY_HEADER.size:BINARY_HEADER.size + (elements + 3) // 4])[:elements]
+    return _split_digit_characters(digits)
+
+
+# Function to convert the binary format back into Morse code.
+def binary_to_morse(data):
+    """
+    Converts the bytes of the binary Morse format back into a Morse code string.
+
+    :param data: The binary file content.
+    :return: The Morse code string.
+    """
+    return ' '.join(map(BINARY_TO_MORSE_TABLE.__getitem__, _binary_characters(data)))
+
+
+# Function to convert the binary format into text.
+def binary_to_text(data):
+    """
+    Converts the bytes of the binary Morse format directly into text.
+
+    :param data: The binary file content.
+    :return: The decoded text.
+    """
+    return ''.join(map(BINARY_TO_TEXT_TABLE.__getitem__, _binary_characters(data)))
+
+
+# Function to check if a file uses the binary format.
+def is_binary_morse_file(filename):
+    with open(filename, 'rb') as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+# A reader that jumps to any character or word of a binary Morse file.
+class BinaryMorseReader:
+    """
+    Reads parts of a binary Morse file without decoding everything before them.
+    Only the header and the small index are loaded; each read decodes just the blocks it needs.
+    """
+
+    def __init__(self, filename):
+        self.file = open(filename, 'rb')
+        self.block_chars, self.characters, self.elements, index_position = \
+            _read_binary_header(self.file.read(BINARY_HEADER.size))
+        self.file.seek(index_position)
+        index = self.file.read()
+        entries = [BINARY_INDEX_ENTRY.unpack_from(index, offset) for offset in range(0, len(index), BINARY_INDEX_ENTRY.size)]
+        self.block_offsets = [offset for offset, _ in entries] + [self.elements]
+        self.block_separators = [separators for _, separators in entries]
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _block_codes(self, first_block, last_block):
+        # Read and unpack only the bytes that hold the elements of these blocks.
+        start, end = self.block_offsets[first_block], self.block_offsets[last_block + 1]
+        self.file.seek(BINARY_HEADER.size + start // 4)
+        data = self.file.read((end + 3) // 4 - start // 4)
+        digits = _unpack_digits(data)[start % 4:start % 4 + end - start]
+        return _split_digit_characters(digits)
+
+    def read_codes(self, start, count):
+        """
+        Reads characters as pieces of base-4 digits, starting at character number start (0-based).
+        """
+        end = min(start + count, self.characters)
+        if start >= end:
+            return []
+        first_block, last_block = start // self.block_chars, (end - 1) // self.block_chars
+        skip = start - first_block * self.block_chars
+        return self._block_codes(first_block, last_block)[skip:skip + end - start]
+
+    def read_characters(self, start, count=1):
+        """
+        Decodes count characters of text, starting at character number start (0-based).
+        """
+        return ''.join(map(BINARY_TO_TEXT_TABLE.__getitem__, self.read_codes(start, count)))
+
+    def read_morse(self, start, count=1):
+        """
+        Returns the Morse code of count characters, starting at character number start (0-based).
+        """
+        return ' '.join(map(BINARY_TO_MORSE_TABLE.__getitem__, self.read_codes(start, count)))
+
+    def word_start(self, word):
+        """
+        Finds the character number where word number word (0-based) starts.
+        """
+        if word <= 0:
+            return 0
+        # The block that holds the separator in front of the word.
+        block = bisect_left(self.block_separators, word) - 1
+        if block < 0 or block >= len(self.block_separators):
+            return self.characters
+        codes = self._block_codes(block, block)
+        wanted = word - self.block_separators[block]
+        position = -1
+        for _ in range(wanted):
+            try:
+                position = codes.index('3', position + 1)
+            except ValueError:
+                return self.characters  # There is no such word: it would start after the end of the file.
+        return block * self.block_chars + position + 1
+
+    def read_words(self, start, count=1):
+        """
+        Decodes count words of text, starting at word number start (0-based).
+        """
+        first = self.word_start(start)
+        end = self.word_start(start + count)
+        if end < self.characters or end > first and self.read_codes(end - 1, 1) == ['3']:
+            end -= 1  # Leave out the separator after the last word.
+        return self.read_characters(first, end - first)
 
 
 # Function to save Morse code to a file.
-def save_to_file(filename, content):
+def save_to_file(filename, content, binary=False):
     """
     Saves the given content (text or Morse code) to a file.
 
     :param filename: Name of the file to save the content to.
     :param content: The content to save (text or Morse code).
+    :param binary: Whether to save Morse code in the compact binary format.
     """
-    with open(filename, 'w') as file:
-        file.write(content)  # Write the content to the file.
+    if binary:
+        with open(filename, 'wb') as file:
+            file.write(morse_to_binary(content))  # Pack the Morse code into 2 bits per element.
+    else:
+        with open(filename, 'w') as file:
+            file.write(content)  # Write the content to the file.
     print(f"Saved to {filename}.")  # Confirm that the content was saved.
 
 
@@ -112,11 +1004,15 @@ def save_to_file(filename, content):
 def load_from_file(filename):
     """
     Loads the content of a file and returns it as a string.
+    Files in the binary Morse format are recognised and converted back into Morse code.
 
     :param filename: Name of the file to load the content from.
     :return: The content of the file as a string, or None if the file doesn't exist.
     """
     if os.path.exists(filename):  # Check if the file exists.
+        if is_binary_morse_file(filename):
+            with open(filename, 'rb') as file:
+                return binary_to_morse(file.read())  # Unpack the binary format.
         with open(filename, 'r') as file:
             return file.read().strip()  # Read the file and return the content.
     else:
@@ -135,7 +1031,9 @@ def main():
     print("3. Play Morse Code as Sound")
     print("4. Save Morse Code to File")
     print("5. Load Morse Code from File")
-    print("6. Exit")
+    print("6. Save Morse Code Sound to WAV File")
+    print("7. Decode Morse Code from WAV File")
+    print("8. Exit")
 
     # Start a loop to continuously show the menu and get user input.
     while True:
@@ -156,7 +1054,8 @@ def main():
             text = input("Enter the text to save as Morse code: ")
             morse_code = text_to_morse(text)  # Convert the text to Morse code.
             filename = input("Enter the filename to save: ")
-            save_to_file(filename, morse_code)  # Save the Morse code to a file.
+            binary = input("Save in the compact binary format? (yes/no): ").strip().lower() == "yes"
+            save_to_file(filename, morse_code, binary)  # Save the Morse code to a file.
         elif choice == '5':  # If the user chooses option 5:
             filename = input("Enter the filename to load: ")
             morse_code = load_from_file(filename)  # Load Morse code from the file.
@@ -165,6 +1064,18 @@ def main():
                 text = morse_to_text(morse_code)  # Convert the Morse code to text.
                 print(f"Text: {text}")
         elif choice == '6':  # If the user chooses option 6:
+            morse_code = input("Enter the Morse code to save as sound: ")
+            filename = input("Enter the WAV filename to save: ")
+            save_morse_wav(filename, morse_code)  # Render the Morse code into a WAV file.
+            print(f"Saved to {filename}.")
+        elif choice == '7':  # If the user chooses option 7:
+            filename = input("Enter the WAV filename to decode: ")
+            if os.path.exists(filename):
+                text = wav_to_text(filename)  # Listen to the recording and decode it.
+                print(f"Text: {text}")
+            else:
+                print(f"{filename} not found.")
+        elif choice == '8':  # If the user chooses option 8:
             print("Exiting...")  # Exit the program.
             break  # Break the loop to end the program.
         else:
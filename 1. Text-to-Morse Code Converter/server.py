@@ -0,0 +1,252 @@
+import argparse  # Importing argparse to read the command-line options.
+import asyncio  # Importing asyncio to serve many clients from one process.
+import json  # Importing json to report the statistics.
+import time  # Importing time to measure latency and throughput.
+from collections import deque  # Importing deque to keep the most recent latencies.
+
+from main import morse_to_text_batch, text_to_morse_batch
+
+# Default settings of the service.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+MAX_QUEUE = 10_000  # Requests waiting to be converted. Further requests get '503 Service Unavailable'.
+MAX_QUEUED_CHARS = 64 * 1024 * 1024  # The total length of the waiting requests. Further requests get '503 Service Unavailable'.
+MAX_BATCH = 1_000  # The most requests converted in one pass through the tables.
+MAX_BATCH_CHARS = 1024 * 1024  # The most characters converted in one pass, so no batch takes long.
+MAX_BODY = 1024 * 1024  # The largest accepted request body, in bytes.
+MAX_HEADERS = 100  # The most header lines accepted in one request.
+LATENCY_SAMPLES = 10_000  # How many recent latencies are kept for the percentiles.
+
+# The conversion for each operation. Both take a list of strings and return a list of strings.
+OPERATIONS = {"encode": text_to_morse_batch, "decode": morse_to_text_batch}
+
+
+# Class that collects requests and converts them in batches.
+class MorseBatcher:
+    """
+    Queues encode and decode requests and converts everything that is waiting in one batch.
+    Under load many small requests share a single pass through the lookup tables.
+    The queue is bounded by the number of requests and by their total length, so a flood of requests
+    is rejected instead of using up all the memory.
+    The batches are converted in a thread, so the other connections are still served meanwhile.
+    """
+
+    def __init__(self, max_queue=MAX_QUEUE, max_batch=MAX_BATCH, max_queued_chars=MAX_QUEUED_CHARS,
+                 max_batch_chars=MAX_BATCH_CHARS):
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.queued_chars = 0
+        self.max_queued_chars = max_queued_chars
+        self.max_batch = max_batch
+        self.max_batch_chars = max_batch_chars
+        self.started = time.monotonic()
+        self.requests = dict.fromkeys(OPERATIONS, 0)
+        self.rejected = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    async def submit(self, operation, payload):
+        """
+        Queues a request and waits for its result.
+
+        :param operation: 'encode' or 'decode'.
+        :param payload: The text or Morse code to convert.
+        :return: The converted string.
+        :raises asyncio.QueueFull: If too many requests, or too many characters, are already waiting.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            if self.queued_chars + len(payload) > self.max_queued_chars:
+                raise asyncio.QueueFull
+            self.queue.put_nowait((operation, payload, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        self.queued_chars += len(payload)
+        return await future
+
+    async def run(self):
+        """
+        Takes requests from the queue and converts them in batches, forever.
+        A batch holds at most max_batch requests and max_batch_chars characters (but always at least one request).
+        """
+        loop = asyncio.get_running_loop()
+        carried = None
+        while True:
+            batch = [carried or await self.queue.get()]  # Wait for at least one request.
+            carried = None
+            size = len(batch[0][1])
+            while len(batch) < self.max_batch and not self.queue.empty():
+                item = self.queue.get_nowait()  # Take everything else that is already waiting...
+                if size + len(item[1]) > self.max_batch_chars:
+                    carried = item  # ...until the batch is full. This request starts the next batch.
+                    break
+                batch.append(item)
+                size += len(item[1])
+            self.queued_chars -= size
+
+            for operation, convert in OPERATIONS.items():
+                items = [item for item in batch if item[0] == operation]
+                if not items:
+                    continue
+                results = await loop.run_in_executor(None, convert, [payload for _, payload, _, _ in items])
+                finished = time.perf_counter()
+                for (_, _, future, queued), result in zip(items, results):
+                    if not future.done():  # The client may have disconnected.
+                        future.set_result(result)
+                    self.latencies.append(finished - queued)
+                self.requests[operation] += len(items)
+
+            self.batches += 1
+            self.batched_requests += len(batch)
+
+    def stats(self):
+        """
+        Returns the counters of the service as a dictionary.
+        """
+        uptime = time.monotonic() - self.started
+        total = sum(self.requests.values())
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000 if latencies else 0.0
+
+        return {
+            "uptime_seconds": round(uptime, 3),
+            "requests": dict(self.requests, total=total),
+            "rejected": self.rejected,
+            "queued": self.queue.qsize(),
+            "queued_characters": self.queued_chars,
+            "batches": self.batches,
+            "average_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "requests_per_second": round(total / uptime, 2) if uptime else 0.0,
+            "latency_ms": {"p50": round(percentile(0.5), 3), "p90": round(percentile(0.9), 3),
+                           "p99": round(percentile(0.99), 3), "max": round(latencies[-1] * 1000, 3) if latencies else 0.0},
+        }
+
+
+# Function to send an HTTP response.
+async def send_response(writer, status, body, content_type="text/plain; charset=utf-8", keep_alive=True):
+    data = body.encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("ascii") + data
+    )
+    await writer.drain()  # Wait if the client reads slowly (backpressure on the way out).
+
+
+# Function to read one line of a request's head.
+async def read_line(reader):
+    """
+    Returns the next line, or None if it is longer than the reader's limit (64 KiB by default).
+    """
+    try:
+        return await reader.readline()
+    except ValueError:  # asyncio raises ValueError when a line does not fit in the buffer.
+        return None
+
+
+# Function that serves one client connection.
+async def handle_client(batcher, reader, writer):
+    """
+    Reads HTTP requests from one connection and answers them, until the client closes it.
+
+    POST /encode  with text in the body returns the Morse code.
+    POST /decode  with Morse code in the body returns the text.
+    GET  /stats   returns the latency and throughput counters as JSON.
+    """
+    try:
+        while True:
+            request_line = await read_line(reader)
+            if request_line is None:
+                await send_response(writer, "400 Bad Request", "The request line is too long.\n", keep_alive=False)
+                break
+            if not request_line:
+                break  # The client closed the connection.
+            try:
+                method, path, version = request_line.decode("latin-1").split()
+            except ValueError:
+                await send_response(writer, "400 Bad Request", "Bad request line.\n", keep_alive=False)
+                break
+
+            # Read the headers.
+            headers = {}
+            header_lines = 0
+            while header_lines <= MAX_HEADERS:
+                line = await read_line(reader)
+                if line in (b"\r\n", b"\n", b"", None):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+                header_lines += 1
+            if line is None or header_lines > MAX_HEADERS:
+                await send_response(writer, "431 Request Header Fields Too Large",
+                                    f"Send at most {MAX_HEADERS} header lines of at most 64 KiB each.\n", keep_alive=False)
+                break
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+            content_length = headers.get("content-length") or "0"
+            if not (content_length.isascii() and content_length.isdigit()):
+                await send_response(writer, "400 Bad Request", "Content-Length must be a non-negative integer.\n", keep_alive=False)
+                break
+            length = int(content_length)
+            if length > MAX_BODY:
+                await send_response(writer, "413 Payload Too Large", f"The body is limited to {MAX_BODY} bytes.\n", keep_alive=False)
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            operation = path.strip("/").split("?")[0]
+            if method == "GET" and operation == "stats":
+                await send_response(writer, "200 OK", json.dumps(batcher.stats()) + "\n", "application/json", keep_alive)
+            elif method == "POST" and operation in OPERATIONS:
+                try:
+                    result = await batcher.submit(operation, body.decode("utf-8", "replace"))
+                except asyncio.QueueFull:
+                    await send_response(writer, "503 Service Unavailable", "Too many requests, try again later.\n", keep_alive=keep_alive)
+                else:
+                    await send_response(writer, "200 OK", result, keep_alive=keep_alive)
+            else:
+                await send_response(writer, "404 Not Found", "Use POST /encode, POST /decode or GET /stats.\n", keep_alive=keep_alive)
+
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass  # The client went away in the middle of a request.
+    finally:
+        writer.close()
+
+
+# Function to start the service.
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, max_queue=MAX_QUEUE, max_batch=MAX_BATCH,
+                max_queued_chars=MAX_QUEUED_CHARS):
+    """
+    Starts the Morse code service and runs it until it is stopped.
+    """
+    batcher = MorseBatcher(max_queue, max_batch, max_queued_chars)
+    worker = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(lambda reader, writer: handle_client(batcher, reader, writer),
+                                        host, port, backlog=4096)
+    print(f"Morse code service listening on http://{host}:{port} (POST /encode, POST /decode, GET /stats)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        worker.cancel()
+
+
+# Run the service if this file is executed directly.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Morse code encoding and decoding over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE, help="requests that may wait before new ones are rejected")
+    parser.add_argument("--max-queued-chars", type=int, default=MAX_QUEUED_CHARS,
+                        help="total characters of waiting requests before new ones are rejected")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="most requests converted in one batch")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_queue, args.max_batch, args.max_queued_chars))
+    except KeyboardInterrupt:
+        print("Stopped.")
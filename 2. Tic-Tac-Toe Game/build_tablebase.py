@@ -0,0 +1,162 @@
+import argparse  # This imports argparse, which reads the command-line options.
+import itertools  # This imports itertools, which lists every possible 3x3 board.
+import random  # This imports random, which plays the random games that lead to endgame positions.
+import sys  # This imports sys, which sets the exit code.
+import time  # This imports time, which measures how long the tablebase takes to build.
+
+from main import (TABLEBASE_UNKNOWN, TABLEBASE_WIN, AlphaBetaAI, Board, board_symmetries, position_hashes,
+                  position_key, tablebase_path, write_tablebase, zobrist_keys)
+
+COMPLETE_CELLS = 9  # Boards with this many cells or fewer are solved completely (3x3 has 3^9 = 19683 ways to fill in).
+
+class Solver:
+    """
+    This class solves positions exactly with negamax, remembering every position it has solved.
+    Scores are from the point of view of the player to move: TABLEBASE_WIN minus the number of moves to a win,
+    the negative of that for a loss, and 0 for a draw. So the solver prefers quick wins and slow losses.
+    """
+
+    def __init__(self, size):
+        self.keys = zobrist_keys(size)
+        self.symmetries = board_symmetries(size)[0]
+        self.entries = {}  # Position key -> (score, best move in the canonical orientation).
+
+    def solve(self, board, player, hashes=None):
+        """
+        This function returns the score of the position for player 0 or 1 to move, and stores its best move.
+        """
+        hashes = hashes or position_hashes(board)
+        key, symmetry = position_key(hashes, player)
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry[0]
+
+        wins = board.winning_moves(player)
+        if wins:
+            best_score, best_move = TABLEBASE_WIN - 1, wins[0]
+        else:
+            # If the opponent threatens to win, only the blocking moves can be right.
+            taken = board.bits[0] | board.bits[1]
+            moves = board.winning_moves(1 - player) or [cell for cell in range(board.size * board.size) if not taken >> cell & 1]
+            best_score, best_move = -TABLEBASE_WIN, moves[0]
+            for cell in moves:
+                if board.place_cell(cell, player):
+                    score = TABLEBASE_WIN - 1
+                elif board.empty_count == 0:
+                    score = 0
+                else:
+                    child = [h ^ mark for h, mark in zip(hashes, self.keys[player][cell])]
+                    score = -self.solve(board, 1 - player, child)
+                    score += -1 if score > 0 else 1 if score < 0 else 0  # One move further away.
+                board.remove_cell(cell)
+                if score > best_score:
+                    best_score, best_move = score, cell
+
+        self.entries[key] = (best_score, self.symmetries[symmetry][best_move])
+        return best_score
+
+def solve_complete(solver, size, win_length):
+    """
+    This function solves every position of a small board, with either player to move,
+    including positions that only come up when a player runs out of time and loses a turn.
+    """
+    for marks in itertools.product((None, 0, 1), repeat=size * size):
+        board = Board(size, win_length=win_length)
+        for cell, who in enumerate(marks):
+            if who is not None and board.place_cell(cell, who):
+                break  # Someone has already won, so there is no move to store.
+        else:
+            if board.empty_count:
+                for player in (0, 1):
+                    solver.solve(board, player)
+
+def solve_endgames(solver, size, win_length, empties, games, generator):
+    """
+    This function plays random games until only `empties` cells are left and solves every position it reaches from there.
+    """
+    for _ in range(games):
+        board = Board(size, win_length=win_length)
+        player = 0
+        while board.empty_count > empties:
+            taken = board.bits[0] | board.bits[1]
+            cell = generator.choice([cell for cell in range(size * size) if not taken >> cell & 1])
+            if board.place_cell(cell, player):
+                break
+            player = 1 - player
+        else:
+            solver.solve(board, player)
+
+def build_book(solver, size, win_length, plies, search_time):
+    """
+    This function searches every position of the first `plies` moves (with the first player starting)
+    for search_time seconds each, and returns the book entries that are not already solved exactly.
+    """
+    symmetries = board_symmetries(size)[0]
+    book = {}
+    layer = {position_key(position_hashes(Board(size, win_length=win_length)), 0)[0]: ()}  # Key -> moves played.
+    for ply in range(plies):
+        player = ply % 2
+        next_layer = {}
+        for moves in layer.values():
+            board = Board(size, win_length=win_length)
+            for index, cell in enumerate(moves):
+                board.place_cell(cell, index % 2)
+            key, symmetry = position_key(position_hashes(board), player)
+            if key not in solver.entries and key not in book:
+                cell = AlphaBetaAI().best_move(board, player, search_time)
+                book[key] = (TABLEBASE_UNKNOWN, symmetries[symmetry][cell])
+
+            if ply + 1 == plies:
+                continue  # The last layer has no next layer.
+            # Every move leads to a position of the next layer (mirrored positions are only kept once).
+            taken = board.bits[0] | board.bits[1]
+            for cell in range(size * size):
+                if not taken >> cell & 1:
+                    won = board.place_cell(cell, player)
+                    if not won and board.empty_count:
+                        next_layer.setdefault(position_key(position_hashes(board), 1 - player)[0], moves + (cell,))
+                    board.remove_cell(cell)
+        layer = next_layer
+    return book
+
+def main(argv=None):
+    """
+    This function reads the command-line options, builds the tablebase and writes it to disk.
+    """
+    parser = argparse.ArgumentParser(description="Build the opening book and endgame tablebase used by the Tic Tac Toe AI.")
+    parser.add_argument("-s", "--size", type=int, default=3, help="size of the board (default 3)")
+    parser.add_argument("-k", "--win-length", type=int, help="marks in a row that win (default: the board size)")
+    parser.add_argument("--book-plies", type=int, default=3, help="moves from the start covered by the opening book (default 3)")
+    parser.add_argument("--book-time", type=float, default=1.0, help="seconds of search per opening book position")
+    parser.add_argument("--endgame-empties", type=int, default=8, help="solve endgames from this many empty cells (default 8)")
+    parser.add_argument("--endgame-games", type=int, default=5000, help="random games played to find endgame positions")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random games")
+    parser.add_argument("-o", "--output", help="file to write (default: the file ai_move looks for)")
+    args = parser.parse_args(argv)
+
+    win_length = args.win_length or args.size
+    if args.size < 3 or not 3 <= win_length <= args.size:
+        parser.error("the board size must be at least 3, and the win length between 3 and the board size")
+    output = args.output or tablebase_path(args.size, win_length)
+
+    start_time = time.perf_counter()
+    solver = Solver(args.size)
+    if args.size * args.size <= COMPLETE_CELLS:
+        print(f"Solving every {args.size}x{args.size} position...")
+        solve_complete(solver, args.size, win_length)
+        entries = solver.entries
+    else:
+        print(f"Solving endgames with {args.endgame_empties} empty cells from {args.endgame_games:,} random games...")
+        solve_endgames(solver, args.size, win_length, args.endgame_empties, args.endgame_games, random.Random(args.seed))
+        print(f"Searching the opening book ({args.book_plies} moves, {args.book_time} s per position)...")
+        book = build_book(solver, args.size, win_length, args.book_plies, args.book_time)
+        entries = {**book, **solver.entries}  # Exact results win over book moves.
+        print(f"Opening book: {len(book):,} positions")
+
+    write_tablebase(output, args.size, win_length, entries)
+    print(f"Wrote {len(entries):,} positions to {output} in {time.perf_counter() - start_time:.1f} s.")
+    return 0
+
+# Build the tablebase if this file is executed directly.
+if __name__ == "__main__":
+    sys.exit(main())
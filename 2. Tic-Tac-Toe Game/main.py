@@ -1,60 +1,319 @@
+import argparse  # This imports argparse, which reads the command-line options (like --profile).
+import csv  # This imports csv, which saves the profile as a spreadsheet.
+import json  # This imports json, which saves the profile as JSON.
+import math  # This imports the math module, which the Monte Carlo AI uses to balance its choices.
+import mmap  # This imports mmap, which lets the AI read its tablebase file without loading it.
+import os  # This imports the os module, which tells us how many CPU cores there are.
 import random  # This imports the random module, which we will use for making random choices in the game (for the AI's move).
+import shutil  # This imports shutil, which tells us how big the terminal is.
+import struct  # This imports struct, which reads and writes the records of the tablebase file.
+import sys  # This imports sys, which lets the board be written to the screen in one go.
 import time  # This imports the time module, which allows us to set a time limit for the player's move.
-from colorama import Fore, Style  # This imports the colorama module, which helps in adding colors to text (like red, blue, green).
+from concurrent.futures import ProcessPoolExecutor  # This imports a process pool, so the AI can think on every CPU core.
+from contextlib import contextmanager, nullcontext  # This imports the tools that time a block of code.
+from functools import lru_cache  # This imports lru_cache, which remembers the lines of each board size.
+from colorama import Cursor, Fore, Style, just_fix_windows_console  # This imports the colorama module, which helps in adding colors to text (like red, blue, green) and moving the cursor.
+from colorama.ansi import clear_screen  # This imports the code that clears the screen (or the part below the cursor).
+
+@lru_cache(maxsize=None)
+def board_lines(size, win_length):
+    """
+    This function lists every line that wins the game on a board of the given size:
+    every run of win_length cells in a row, in a column, or along a diagonal in either direction.
+    When win_length equals the size, these are just the rows, the columns and the two main diagonals.
+    It returns the cells of each line, a bit mask of each line, and for every cell the lines that go through it.
+    The result is remembered, so it is only worked out once per board size and win length.
+    """
+    lines = []
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):  # Right, down, down-right and down-left.
+        for r in range(size):
+            for c in range(size):
+                end_r, end_c = r + dr * (win_length - 1), c + dc * (win_length - 1)
+                if 0 <= end_r < size and 0 <= end_c < size:  # The whole line fits on the board.
+                    lines.append([(r + dr * i, c + dc * i) for i in range(win_length)])
+
+    # Bit number r * size + c stands for the cell in row r, column c.
+    masks = [sum(1 << (r * size + c) for r, c in line) for line in lines]
+    cell_lines = [[] for _ in range(size * size)]
+    for index, line in enumerate(lines):
+        for r, c in line:
+            cell_lines[r * size + c].append(index)
+    return lines, masks, tuple(tuple(indexes) for indexes in cell_lines)
+
+@lru_cache(maxsize=None)
+def line_weights(win_length):
+    """
+    This function returns how much a line is worth to a player with 0, 1, 2, ... marks on it
+    (and none of the opponent's marks). Every extra mark makes the line 4 times as valuable.
+    """
+    return tuple((1 << (2 * marks)) - 1 for marks in range(win_length + 1))
+
+class Board:
+    """
+    This class stores the Tic Tac Toe board as two integer bitboards, one for each player.
+    Bit number r * size + c is set when the player has a mark in row r, column c.
+    A player wins with win_length marks in a row (by default the whole size of the board).
+    The board counts the marks of each player on every line, keeps the lines that are one move from winning
+    (the open threats) and a running score of all the lines. A move only updates the lines through it,
+    which is at most 4 * win_length lines, so checking for a win, finding threats and scoring the position
+    do not depend on how big the board is. Checking for a draw is a single comparison.
+    """
+
+    def __init__(self, size, symbols=('X', 'O'), win_length=None):
+        self.size = size  # The size of the board (like 3 for a 3x3 board).
+        self.win_length = win_length or size  # How many marks in a row win the game.
+        self.symbols = list(symbols)  # The symbol of player 0 and player 1.
+        self.players = {symbol: index for index, symbol in enumerate(self.symbols)}
+        self.bits = [0, 0]  # One bitboard for each player.
+        self.empty_count = size * size  # The number of empty cells.
+        self.lines, self.line_masks, self.cell_lines = board_lines(size, self.win_length)
+        self.weights = line_weights(self.win_length)
+        self.counts = [[0] * len(self.lines), [0] * len(self.lines)]  # Marks of each player on each line.
+        self.threats = [set(), set()]  # Lines where a player has all but one cell and the opponent has none.
+        self.score = 0  # The value of all the lines, from player 0's point of view.
+        self.winner = None  # The symbol of the winner, once there is one.
+        self.winning_positions = []  # The cells of the winning line.
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, row):
+        # This lets the board be read like a list of rows, e.g. board[r][c] or enumerate(board).
+        if not 0 <= row < self.size:
+            raise IndexError(row)
+        return [self.cell(row, c) for c in range(self.size)]
+
+    def cell(self, row, col):
+        """
+        This function returns the symbol in a cell, or ' ' if the cell is empty.
+        """
+        bit = 1 << (row * self.size + col)
+        if self.bits[0] & bit:
+            return self.symbols[0]
+        if self.bits[1] & bit:
+            return self.symbols[1]
+        return ' '
+
+    def is_empty(self, row, col):
+        """
+        This function checks if a cell is empty.
+        """
+        return not (self.bits[0] | self.bits[1]) >> (row * self.size + col) & 1
+
+    def empty_cells(self):
+        """
+        This function returns a list of all empty cells as (row, col) pairs.
+        """
+        taken = self.bits[0] | self.bits[1]
+        return [divmod(i, self.size) for i in range(self.size * self.size) if not taken >> i & 1]
+
+    def place(self, row, col, symbol):
+        """
+        This function puts a symbol on the board and returns True if that move wins the game.
+        Only the lines through the new mark are checked.
+        """
+        return self.place_cell(row * self.size + col, self.players[symbol])
+
+    def place_cell(self, cell, player):
+        """
+        This function puts player 0 or 1 on a cell numbered r * size + c, and returns True if that move wins.
+        It is the fast version of place() that the AI search uses.
+        """
+        self.bits[player] |= 1 << cell
+        self.empty_count -= 1
+        mine, theirs = self.counts[player], self.counts[1 - player]
+        last = self.win_length - 1
+        weights = self.weights
+        sign = 1 if player == 0 else -1
+        won = False
+        for line in self.cell_lines[cell]:
+            count, other = mine[line] + 1, theirs[line]
+            mine[line] = count
+            if not other:
+                self.score += sign * (weights[count] - weights[count - 1])  # The line is worth more to the player.
+                if count == last:
+                    self.threats[player].add(line)  # One more move on this line wins.
+                elif count > last:
+                    self.threats[player].discard(line)
+                    if not won:  # The player has every cell of this line.
+                        won = True
+                        self.winner = self.symbols[player]
+                        self.winning_positions = self.lines[line]
+            elif count == 1:
+                self.score += sign * weights[other]  # The opponent's line is blocked and worth nothing now.
+                if other == last:
+                    self.threats[1 - player].discard(line)
+        return won
+
+    def remove(self, row, col):
+        """
+        This function takes a mark off the board again (used to undo a move).
+        """
+        self.remove_cell(row * self.size + col)
+
+    def remove_cell(self, cell):
+        """
+        This function empties a cell numbered r * size + c again.
+        """
+        bit = 1 << cell
+        player = 0 if self.bits[0] & bit else 1
+        if not self.bits[player] & bit:
+            return  # The cell is already empty.
+        self.bits[player] &= ~bit
+        self.empty_count += 1
+        mine, theirs = self.counts[player], self.counts[1 - player]
+        last = self.win_length - 1
+        weights = self.weights
+        sign = 1 if player == 0 else -1
+        for line in self.cell_lines[cell]:
+            count, other = mine[line] - 1, theirs[line]
+            mine[line] = count
+            if not other:
+                self.score -= sign * (weights[count + 1] - weights[count])
+                if count == last:
+                    self.threats[player].add(line)  # The line is one move from winning again.
+                elif count == last - 1:
+                    self.threats[player].discard(line)
+            elif count == 0:
+                self.score -= sign * weights[other]  # The opponent's line is open again.
+                if other == last:
+                    self.threats[1 - player].add(line)
+        if divmod(cell, self.size) in self.winning_positions:
+            self.winner, self.winning_positions = None, []  # The winning line is broken again.
+
+    def winning_moves(self, player):
+        """
+        This function returns every empty cell (as a number) where player 0 or 1 would complete a line.
+        Only the open threats of the player are looked at, so the board is not scanned.
+        """
+        taken = self.bits[0] | self.bits[1]
+        cells = set()
+        for line in self.threats[player]:
+            free = self.line_masks[line] & ~taken  # The one empty cell left on this line.
+            cells.add(free.bit_length() - 1)
+        return sorted(cells)
+
+    def winning_cells(self, symbol):
+        """
+        This function returns every empty cell (as a (row, col) pair) where the given symbol would complete a line.
+        """
+        return [divmod(cell, self.size) for cell in self.winning_moves(self.players[symbol])]
+
+@lru_cache(maxsize=None)
+def cell_glyph(cell, highlighted=False):
+    """
+    This function returns the colored text of one cell. Each colored string is only built once and then remembered.
+    Winning positions are green, 'X' is red, 'O' is blue and everything else is printed normally.
+    """
+    if highlighted:
+        return Fore.GREEN + cell + Style.RESET_ALL
+    if cell == 'X':
+        return Fore.RED + cell + Style.RESET_ALL
+    if cell == 'O':
+        return Fore.BLUE + cell + Style.RESET_ALL
+    return cell
+
+class BoardRenderer:
+    """
+    This class draws the board in the terminal.
+    Every frame is built in one string and written with a single call.
+    The first frame clears the screen and draws the whole board at the top. After that only the cells that changed
+    since the last frame are redrawn, by moving the cursor to them, so a frame costs as much as the number of changed
+    cells and not the size of the board. Messages and prompts appear below the board and are cleared on the next frame.
+    When the output is not a terminal, or the board does not fit on the screen, the whole board is printed every time.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.reset()
+
+    def reset(self):
+        """
+        This function forgets the last frame, so the next one is drawn in full.
+        """
+        self.shown = None  # (size, symbols) of the board on the screen, or None.
+        self.bits = (0, 0)
+        self.highlight = frozenset()
+
+    def can_update(self, board):
+        """
+        This function checks if single cells can be redrawn: the output must be a terminal,
+        the symbols must be one character wide, and the board plus a few lines of prompts must fit on the screen.
+        """
+        return (self.stream.isatty() and all(len(symbol) == 1 for symbol in board.symbols)
+                and shutil.get_terminal_size().lines >= 2 * board.size + 6)
+
+    def glyph(self, board, cell, highlighted):
+        """
+        This function returns the colored text of a cell numbered r * size + c.
+        """
+        if board.bits[0] >> cell & 1:
+            return cell_glyph(board.symbols[0], highlighted)
+        if board.bits[1] >> cell & 1:
+            return cell_glyph(board.symbols[1], highlighted)
+        return cell_glyph(' ', highlighted)
+
+    def render(self, board, winning_positions=None):
+        """
+        This function draws the board, highlighting the winning positions if provided.
+        """
+        size = board.size
+        highlight = frozenset(r * size + c for r, c in winning_positions or ())
+        frame = []
+        if not self.can_update(board):
+            # Print the whole board below whatever is already on the screen.
+            for r in range(size):
+                frame.extend(self.glyph(board, r * size + c, r * size + c in highlight) + " | " for c in range(size))
+                frame.append("\n" + "-" * (size * 4) + "\n")
+            self.reset()
+        elif self.shown != (size, tuple(board.symbols)):
+            # Clear the screen and draw the whole board at the top.
+            frame.append(clear_screen(2) + Cursor.POS(1, 1))
+            for r in range(size):
+                frame.extend(self.glyph(board, r * size + c, r * size + c in highlight) + " | " for c in range(size))
+                frame.append("\n" + "-" * (size * 4) + "\n")
+            frame.append(clear_screen(0))
+            self.shown = (size, tuple(board.symbols))
+        else:
+            # Only redraw the cells whose mark or highlight changed.
+            changed = (board.bits[0] ^ self.bits[0]) | (board.bits[1] ^ self.bits[1])
+            for cell in highlight ^ self.highlight:
+                changed |= 1 << cell
+            while changed:
+                lowest = changed & -changed
+                changed ^= lowest
+                cell = lowest.bit_length() - 1
+                r, c = divmod(cell, size)
+                frame.append(Cursor.POS(4 * c + 1, 2 * r + 1) + self.glyph(board, cell, cell in highlight))
+            frame.append(Cursor.POS(1, 2 * size + 1) + clear_screen(0))  # Clear the old messages below the board.
+        if self.shown is not None:
+            self.bits, self.highlight = tuple(board.bits), highlight
+        self.stream.write("".join(frame))
+        self.stream.flush()
+
+RENDERER = BoardRenderer()  # One renderer for the whole session, so it knows what is on the screen.
 
 def print_board(board, winning_positions=None):
     """
     This function prints the Tic Tac Toe board.
     It also highlights the winning positions if provided.
+    Only the cells that changed since the last time are redrawn (see BoardRenderer).
     """
-    size = len(board)  # We get the size of the board (like 3 for a 3x3 board).
-    for r, row in enumerate(board):  # Loop over each row (r is the row index).
-        for c, cell in enumerate(row):  # Loop over each cell in the row (c is the column index).
-            if winning_positions and (r, c) in winning_positions:
-                # If there are winning positions, highlight the cells in green.
-                print(Fore.GREEN + cell + Style.RESET_ALL, end=" | ")
-            elif cell == 'X':
-                # If the cell contains 'X', print it in red color.
-                print(Fore.RED + cell + Style.RESET_ALL, end=" | ")
-            elif cell == 'O':
-                # If the cell contains 'O', print it in blue color.
-                print(Fore.BLUE + cell + Style.RESET_ALL, end=" | ")
-            else:
-                # If the cell is empty (contains ' '), print it normally.
-                print(cell, end=" | ")
-        print("\n" + "-" * (size * 4))  # Print a separator line after each row to make the board look nice.
+    RENDERER.render(board, winning_positions)
 
 def check_win(board):
     """
     This function checks if there is a winner.
     It returns the symbol of the winner ('X' or 'O') and the winning positions, or None if no winner.
+    The board keeps track of the winner as moves are placed, so nothing has to be scanned here.
     """
-    size = len(board)  # Get the size of the board (3 for a 3x3 board).
-
-    # Check rows and columns for a winner.
-    for i in range(size):
-        if all(board[i][j] == board[i][0] != ' ' for j in range(size)):
-            # If all cells in the row i are the same and not empty, then return the winner and the winning positions.
-            return board[i][0], [(i, j) for j in range(size)]
-        if all(board[j][i] == board[0][i] != ' ' for j in range(size)):
-            # If all cells in the column i are the same and not empty, return the winner and the winning positions.
-            return board[0][i], [(j, i) for j in range(size)]
-
-    # Check diagonals for a winner.
-    if all(board[i][i] == board[0][0] != ' ' for i in range(size)):
-        # If all cells in the main diagonal are the same and not empty, return the winner and the winning positions.
-        return board[0][0], [(i, i) for i in range(size)]
-    if all(board[i][size - i - 1] == board[0][size - 1] != ' ' for i in range(size)):
-        # If all cells in the anti-diagonal are the same and not empty, return the winner and the winning positions.
-        return board[0][size - 1], [(i, size - i - 1) for i in range(size)]
-
-    return None, []  # If no winner, return None.
+    return board.winner, board.winning_positions
 
 def is_draw(board):
     """
     This function checks if the game is a draw (i.e., no empty spaces left and no winner).
     """
-    return all(cell != ' ' for row in board for cell in row)  # If there are no empty cells, it's a draw.
+    return board.empty_count == 0  # If there are no empty cells, it's a draw.
 
 def player_move(board, current_player, time_limit):
     """
@@ -70,7 +329,7 @@ def player_move(board, current_player, time_limit):
             if time.time() - start_time > time_limit:  # Check if the player took too long.
                 print("Time's up! You lost your turn.")  # If the time is up, the turn is lost.
                 return None, None
-            if move < 0 or move >= len(board)**2 or board[row][col] != ' ':
+            if move < 0 or move >= len(board)**2 or not board.is_empty(row, col):
                 # If the move is invalid (out of bounds or the cell is already taken), ask the player to try again.
                 print("Invalid move. Try again.")
                 continue
@@ -78,41 +337,699 @@ def player_move(board, current_player, time_limit):
         except (ValueError, IndexError):
             print("Invalid input. Enter a valid number.")  # Handle invalid input.
 
-def ai_move(board):
+class NullProfiler:
     """
-    This function handles the AI's move. It tries to block the player or win.
+    This class is used when profiling is off. All of its functions do nothing,
+    so the game loop pays almost nothing for the profiling hooks.
     """
-    size = len(board)  # Get the size of the board.
 
-    # Check if AI can win
-    for r in range(size):
-        for c in range(size):
-            if board[r][c] == ' ':
-                board[r][c] = 'O'  # Temporarily make the move for AI.
-                winner, _ = check_win(board)  # Check if AI wins.
-                board[r][c] = ' '  # Undo the move.
-                if winner == 'O':  # If AI wins, return the move.
-                    return r, c
+    enabled = False
+
+    def phase(self, name):
+        return NULL_PHASE
 
-    # Check if AI can block the player
-    for r in range(size):
-        for c in range(size):
-            if board[r][c] == ' ':
-                board[r][c] = 'X'  # Temporarily make the move for the player.
-                winner, _ = check_win(board)  # Check if the player wins.
-                board[r][c] = ' '  # Undo the move.
-                if winner == 'X':  # If the player wins, block the move.
-                    return r, c
+    def count(self, name, amount=1):
+        pass
 
-    # Otherwise, make a random move
-    empty_cells = [(r, c) for r in range(size) for c in range(size) if board[r][c] == ' ']
-    return random.choice(empty_cells)  # If there's no immediate threat, pick a random empty cell.
+    def end_game(self, **info):
+        pass
 
-def tic_tac_toe():
+NULL_PHASE = nullcontext()  # One shared "do nothing" block for every phase.
+NO_PROFILER = NullProfiler()
+
+class Profiler:
+    """
+    This class measures where the time goes in the game loop and the AI.
+    Each phase (like 'ai_move' or 'render') gets a call count, a total time and the slowest call,
+    and counters record things like the number of positions the AI searched.
+    The results are kept for every game and added up for the whole session.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.games = []  # The finished results of every game.
+        self.start_game()
+
+    def start_game(self):
+        """
+        This function starts collecting the results of a new game.
+        """
+        self.phases = {}  # Phase name -> [calls, total seconds, slowest call in seconds].
+        self.counters = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        This function times the code inside a 'with profiler.phase(name):' block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = self.phases.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+
+    def count(self, name, amount=1):
+        """
+        This function adds to a counter.
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def end_game(self, **info):
+        """
+        This function stores the results of the game that just ended, together with details like the board size,
+        and starts a new game.
+        """
+        self.games.append({
+            "game": len(self.games) + 1,
+            **info,
+            "seconds": round(time.perf_counter() - self.started, 6),
+            "phases": {name: self.phase_result(*stats) for name, stats in self.phases.items()},
+            "counters": dict(self.counters),
+        })
+        self.start_game()
+
+    @staticmethod
+    def phase_result(calls, total, slowest):
+        """
+        This function turns the raw numbers of a phase into a dictionary in milliseconds and microseconds.
+        """
+        return {"calls": calls, "total_ms": round(total * 1000, 3),
+                "mean_us": round(total / calls * 1e6, 3) if calls else 0.0, "max_ms": round(slowest * 1000, 3)}
+
+    def session(self):
+        """
+        This function adds up the results of all games.
+        """
+        phases, counters = {}, {}
+        for game in self.games:
+            for name, result in game["phases"].items():
+                stats = phases.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += result["calls"]
+                stats[1] += result["total_ms"] / 1000
+                stats[2] = max(stats[2], result["max_ms"] / 1000)
+            for name, value in game["counters"].items():
+                counters[name] = counters.get(name, 0) + value
+        return {"games": len(self.games), "seconds": round(sum(game["seconds"] for game in self.games), 6),
+                "phases": {name: self.phase_result(*stats) for name, stats in phases.items()}, "counters": counters}
+
+    def summary(self):
+        """
+        This function returns a table of the session results as text.
+        """
+        session = self.session()
+        lines = [f"Profile of {session['games']} game(s), {session['seconds']:.2f} s:",
+                 f"{'phase':<14}{'calls':>8}{'total ms':>12}{'mean us':>12}{'max ms':>10}"]
+        for name, result in sorted(session["phases"].items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(f"{name:<14}{result['calls']:>8}{result['total_ms']:>12.3f}{result['mean_us']:>12.1f}{result['max_ms']:>10.3f}")
+        for name, value in sorted(session["counters"].items()):
+            lines.append(f"{name:<30}{value:>12,}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        """
+        This function saves the results of every game and of the whole session.
+        A path ending in '.csv' gets one row per game and phase (or counter), anything else is saved as JSON.
+        """
+        session = self.session()
+        if not path.lower().endswith(".csv"):
+            with open(path, "w") as file:
+                json.dump({"session": session, "games": self.games}, file, indent=2)
+            return
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["game", "board_size", "win_length", "winner", "name", "calls", "total_ms", "mean_us", "max_ms"])
+            for game in self.games + [dict(session, game="session")]:
+                details = [game["game"], game.get("board_size", ""), game.get("win_length", ""), game.get("winner", "")]
+                for name, result in game["phases"].items():
+                    writer.writerow(details + [name, result["calls"], result["total_ms"], result["mean_us"], result["max_ms"]])
+                for name, value in game["counters"].items():
+                    writer.writerow(details + [name, value, "", "", ""])
+
+AI_TIME_BUDGET = 1.0  # How many seconds the AI may think about a move.
+WIN_SCORE = 1 << 60  # The score of a won position. Wins found sooner score a little higher.
+
+@lru_cache(maxsize=None)
+def board_symmetries(size):
+    """
+    This function lists the 8 symmetries of a square board (4 rotations, each with and without a mirror).
+    Each symmetry is a tuple that tells where every cell (numbered r * size + c) ends up.
+    It returns the symmetries and their inverses.
+    """
+    n = size - 1
+    transforms = [
+        lambda r, c: (r, c), lambda r, c: (c, n - r), lambda r, c: (n - r, n - c), lambda r, c: (n - c, r),
+        lambda r, c: (r, n - c), lambda r, c: (c, r), lambda r, c: (n - r, c), lambda r, c: (n - c, n - r),
+    ]
+    symmetries, inverses = [], []
+    for transform in transforms:
+        forward = [0] * (size * size)
+        for cell in range(size * size):
+            r, c = transform(*divmod(cell, size))
+            forward[cell] = r * size + c
+        backward = [0] * (size * size)
+        for cell, moved in enumerate(forward):
+            backward[moved] = cell
+        symmetries.append(tuple(forward))
+        inverses.append(tuple(backward))
+    return tuple(symmetries), tuple(inverses)
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size):
+    """
+    This function makes the random 64-bit Zobrist keys for a board size.
+    The hash of a position is the XOR of the keys of all its marks, so it can be updated with one XOR per move.
+    For each player and cell it returns the 8 keys of that mark under the 8 board symmetries,
+    so the hashes of all 8 mirrored and rotated versions of a position can be kept up to date together.
+    """
+    generator = random.Random(f"zobrist-{size}")  # Fixed seed, so the keys are the same in every run.
+    keys = [[generator.getrandbits(64) for _ in range(size * size)] for _ in range(2)]
+    symmetries, _ = board_symmetries(size)
+    return tuple(tuple(tuple(keys[player][symmetry[cell]] for symmetry in symmetries)
+                       for cell in range(size * size)) for player in range(2))
+
+@lru_cache(maxsize=None)
+def center_order(size):
+    """
+    This function returns the cells sorted from the center outwards.
+    Central cells are on more lines, so the search tries them first.
+    """
+    middle = (size - 1) / 2
+    return tuple(sorted(range(size * size), key=lambda cell: abs(cell // size - middle) + abs(cell % size - middle)))
+
+class SearchTimeout(Exception):
+    """
+    This exception stops the search when the AI runs out of time.
+    """
+
+class AlphaBetaAI:
+    """
+    This class is the AI opponent. It searches the game tree with negamax and alpha-beta pruning,
+    going one move deeper each round (iterative deepening) until its time is up.
+    Positions it has already searched are kept in a transposition table, keyed by a Zobrist hash.
+    The hash is the smallest of the hashes of the 8 symmetric versions of the position,
+    so mirrored and rotated positions share one entry.
+    """
+
+    EXACT, LOWER, UPPER = 0, 1, 2  # What kind of score a table entry holds.
+
+    def __init__(self, table_bits=18):
+        self.table = [None] * (1 << table_bits)  # A fixed-size table, so its memory is bounded.
+        self.table_mask = (1 << table_bits) - 1
+        self.search_id = 0  # Entries from older searches are replaced first.
+        self.history = {}  # How often each move caused a cutoff, used to sort the moves.
+        self.nodes = 0
+        self.deadline = 0.0
+
+    def best_move(self, board, player, time_budget=AI_TIME_BUDGET):
+        """
+        This function returns the best cell (numbered r * size + c) for player 0 or 1.
+        It keeps searching deeper until the whole game is solved or the time budget is used up.
+        """
+        self.size = board.size
+        self.symmetries, self.inverses = board_symmetries(board.size)
+        self.keys = zobrist_keys(board.size)
+        self.order = center_order(board.size)
+        self.search_id += 1
+        self.nodes = 0
+        self.deadline = time.perf_counter() + time_budget
+
+        hashes = position_hashes(board)  # The hashes of the 8 symmetric versions of the current position.
+
+        moves = self.ordered_moves(board, player, None)
+        best = moves[0]
+        for depth in range(1, board.empty_count + 1):
+            try:
+                score, move = self.search_root(board, player, hashes, depth, best)
+            except SearchTimeout:
+                break  # Keep the move from the last finished round.
+            best = move
+            if abs(score) >= WIN_SCORE // 2:
+                break  # The game is decided, searching deeper will not change the move.
+        return best
+
+    def search_root(self, board, player, hashes, depth, first_move):
+        """
+        This function searches all moves of the current position to the given depth.
+        The best move of the previous round is tried first, which makes the pruning much stronger.
+        """
+        alpha, beta = -WIN_SCORE * 2, WIN_SCORE * 2
+        moves = self.ordered_moves(board, player, first_move)
+        best_score, best_move = -WIN_SCORE * 2, moves[0]
+        for cell in moves:
+            score = self.try_move(board, player, hashes, cell, depth, alpha, beta)
+            if score > best_score:
+                best_score, best_move = score, cell
+            alpha = max(alpha, score)
+        return best_score, best_move
+
+    def try_move(self, board, player, hashes, cell, depth, alpha, beta):
+        """
+        This function plays a move, scores it from the point of view of the player who made it, and takes it back.
+        """
+        try:
+            if board.place_cell(cell, player):
+                return WIN_SCORE - (board.size * board.size - board.empty_count)  # Sooner wins score higher.
+            if board.empty_count == 0:
+                return 0  # A full board without a winner is a draw.
+            keys = self.keys[player][cell]
+            child = [h ^ key for h, key in zip(hashes, keys)]
+            return -self.negamax(board, 1 - player, child, depth - 1, -beta, -alpha)
+        finally:
+            board.remove_cell(cell)  # Also when the search runs out of time, so the board is left as it was.
+
+    def negamax(self, board, player, hashes, depth, alpha, beta):
+        """
+        This function returns the score of the position for the player to move (negamax with alpha-beta).
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+        # A move that wins right away is always best.
+        wins = board.winning_moves(player)
+        if wins:
+            return WIN_SCORE - (board.size * board.size - board.empty_count + 1)
+
+        # Look the position up in the transposition table (using its symmetric version with the smallest hash).
+        key = min(hashes)
+        symmetry = hashes.index(key)
+        entry = self.table[key & self.table_mask]
+        table_move = None
+        original_alpha = alpha
+        if entry is not None and entry[0] == key:
+            _, entry_depth, entry_score, entry_kind, entry_move, _ = entry
+            if entry_depth >= depth:
+                if entry_kind == self.EXACT:
+                    return entry_score
+                if entry_kind == self.LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+            table_move = self.inverses[symmetry][entry_move]  # Turn the stored move back to this orientation.
+
+        if depth == 0:
+            return self.evaluate(board, player)
+
+        # If the opponent threatens to win, only the blocking moves need to be searched.
+        threats = board.winning_moves(1 - player)
+        if len(threats) > 1:
+            # Two threats cannot both be blocked, so the opponent wins on their next move.
+            return -(WIN_SCORE - (board.size * board.size - board.empty_count + 2))
+        moves = threats or self.ordered_moves(board, player, table_move)
+
+        best_score, best_move = -WIN_SCORE * 2, moves[0]
+        for cell in moves:
+            score = self.try_move(board, player, hashes, cell, depth, alpha, beta)
+            if score > best_score:
+                best_score, best_move = score, cell
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.history[cell] = self.history.get(cell, 0) + depth * depth  # Remember moves that cut off.
+                break
+
+        # Store the result. Deeper results, and anything from an older search, get replaced.
+        if best_score <= original_alpha:
+            kind = self.UPPER
+        elif best_score >= beta:
+            kind = self.LOWER
+        else:
+            kind = self.EXACT
+        index = key & self.table_mask
+        old = self.table[index]
+        if old is None or old[5] != self.search_id or old[1] <= depth:
+            self.table[index] = (key, depth, best_score, kind, self.symmetries[symmetry][best_move], self.search_id)
+        return best_score
+
+    def evaluate(self, board, player):
+        """
+        This function guesses the score of a position that is not searched any deeper.
+        Every line that only one player has marks on is worth more the more marks it has.
+        The board keeps this score up to date as moves are made, so it only has to be read here.
+        """
+        return board.score if player == 0 else -board.score
+
+    def ordered_moves(self, board, player, first_move):
+        """
+        This function returns the empty cells in the order the search should try them:
+        the remembered best move first, then moves that often caused cutoffs, then central cells first.
+        """
+        taken = board.bits[0] | board.bits[1]
+        moves = [cell for cell in self.order if not taken >> cell & 1]
+        if self.history:
+            moves.sort(key=lambda cell: -self.history.get(cell, 0))  # A stable sort keeps the center order for ties.
+        if first_move is not None and not taken >> first_move & 1:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+        return moves
+
+SEARCH_AI = AlphaBetaAI()  # One AI for the whole session, so its transposition table is reused between moves.
+
+EXACT_SEARCH_CELLS = 12  # With this many empty cells or fewer (or on a 3x3 board), alpha-beta search is used.
+MCTS_WORKERS = os.cpu_count() or 1  # How many processes the Monte Carlo AI thinks with.
+MCTS_EXPLORATION = 1.4  # How much the Monte Carlo AI tries moves it knows little about.
+MCTS_MARGIN = 0.05  # Seconds kept back for collecting the results of the workers.
+MCTS_PLAYOUT_MOVES = 20  # A playout stops after this many moves and the board's score decides who is ahead.
+
+class MCTSNode:
+    """
+    This class is one position in the Monte Carlo search tree.
+    It remembers the move that led to it, the player who made that move,
+    how often it was visited and how many of those games that player won (a draw counts as half a win).
+    """
+
+    __slots__ = ('move', 'player', 'parent', 'children', 'untried', 'visits', 'wins', 'result')
+
+    def __init__(self, move, player, parent, untried, result=None):
+        self.move = move  # The cell that was played to reach this position.
+        self.player = player  # The player (0 or 1) who played that cell.
+        self.parent = parent
+        self.children = []
+        self.untried = untried  # Moves that have no child node yet.
+        self.visits = 0
+        self.wins = 0.0
+        self.result = result  # For a finished game: the winning player, or -1 for a draw.
+
+    def best_child(self, exploration):
+        """
+        This function picks the child with the highest UCT value:
+        its win rate, plus a bonus for children that have not been visited much.
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+@lru_cache(maxsize=None)
+def neighbour_masks(size, distance=2):
+    """
+    This function returns, for every cell, a bit mask of the cells at most `distance` rows and columns away.
+    The Monte Carlo AI only considers moves near the marks already on the board.
+    """
+    masks = []
+    for cell in range(size * size):
+        r, c = divmod(cell, size)
+        masks.append(sum(1 << (nr * size + nc)
+                         for nr in range(max(0, r - distance), min(size, r + distance + 1))
+                         for nc in range(max(0, c - distance), min(size, c + distance + 1))))
+    return tuple(masks)
+
+def mcts_search(board, player, deadline, seed=None, exploration=MCTS_EXPLORATION, playout_moves=MCTS_PLAYOUT_MOVES):
+    """
+    This function runs Monte Carlo tree search (UCT) for player 0 or 1 until the deadline (a time.time() value).
+    Each round walks down the tree, adds one new position, plays the rest of the game out,
+    and counts the result on the way back up.
+    In the tree, a player who can win only tries the winning move, a player who is threatened only tries the blocks,
+    and otherwise only the cells near the marks on the board are tried.
+    The playouts also take wins and blocks first and play a random cell otherwise.
+    Finding wins and blocks only reads the board's open threats, so this stays fast on large boards.
+    It always plays at least one batch of 64 rounds, even if the deadline has already passed.
+    It returns how often each move of the current position was visited, as a dictionary {cell: visits}.
+    """
+    generator = random.Random(seed)
+    size = board.size
+    cells = range(size * size)
+    near = neighbour_masks(size)
+
+    def empty_cells():
+        taken = board.bits[0] | board.bits[1]
+        moves = [cell for cell in cells if not taken >> cell & 1]
+        generator.shuffle(moves)
+        return moves
+
+    def forced_moves(mover):
+        wins = board.winning_moves(mover)
+        return wins[:1] if wins else board.winning_moves(1 - mover)
+
+    def tree_moves(mover):
+        moves = forced_moves(mover)
+        if moves:
+            return moves
+        taken = board.bits[0] | board.bits[1]
+        if not taken:
+            return [center_order(size)[0]]  # On an empty board only the center is worth trying.
+        area = 0
+        for cell in cells:
+            if taken >> cell & 1:
+                area |= near[cell]
+        moves = [cell for cell in cells if area >> cell & 1 and not taken >> cell & 1]
+        generator.shuffle(moves)  # New children are added in a random order.
+        return moves
+
+    root = MCTSNode(None, 1 - player, None, tree_moves(player))
+    rounds = 0
+    while rounds & 63 or not rounds or time.time() < deadline:  # Check the clock every 64 rounds.
+        rounds += 1
+        node, played = root, []
+
+        # 1. Selection: walk down through fully expanded positions.
+        while not node.untried and node.children and node.result is None:
+            node = node.best_child(exploration)
+            board.place_cell(node.move, node.player)
+            played.append(node.move)
+
+        # 2. Expansion: add one new position to the tree.
+        if node.untried and node.result is None:
+            cell = node.untried.pop()
+            mover = 1 - node.player
+            won = board.place_cell(cell, mover)
+            played.append(cell)
+            result = mover if won else -1 if board.empty_count == 0 else None
+            child = MCTSNode(cell, mover, node, [] if result is not None else tree_moves(1 - mover), result)
+            node.children.append(child)
+            node = child
+
+        # 3. Playout: finish the game, taking wins and blocks first and random cells otherwise.
+        result = node.result
+        if result is None:
+            mover = node.player
+            moves, index = empty_cells(), 0
+            for _ in range(playout_moves):
+                mover = 1 - mover
+                forced = forced_moves(mover)
+                if forced:
+                    cell = forced[0]
+                else:
+                    taken = board.bits[0] | board.bits[1]
+                    while taken >> moves[index] & 1:  # Skip cells already used by a forced move.
+                        index += 1
+                    cell = moves[index]
+                played.append(cell)
+                if board.place_cell(cell, mover):
+                    result = mover
+                    break
+                if board.empty_count == 0:
+                    result = -1  # The board filled up without a winner.
+                    break
+            else:
+                result = 0 if board.score > 0 else 1 if board.score < 0 else -1  # The player with the better lines wins.
+
+        # 4. Backpropagation: count the result in every position on the path.
+        while node is not None:
+            node.visits += 1
+            if result == node.player:
+                node.wins += 1
+            elif result == -1:
+                node.wins += 0.5
+            node = node.parent
+
+        for cell in played:  # Take all the moves of this round back.
+            board.remove_cell(cell)
+
+    return {child.move: child.visits for child in root.children}
+
+def mcts_worker(size, win_length, bits, player, deadline, seed):
+    """
+    This function runs in a worker process. It rebuilds the board from its two bitboards
+    and returns the visit counts of its own Monte Carlo search.
+    """
+    board = Board(size, win_length=win_length)
+    for who in range(2):
+        for cell in range(size * size):
+            if bits[who] >> cell & 1:
+                board.place_cell(cell, who)
+    return mcts_search(board, player, deadline, seed)
+
+MCTS_POOL = None  # The worker processes are started on the AI's first move and reused after that.
+
+def mcts_move(board, player, time_budget=AI_TIME_BUDGET, workers=None, profiler=NO_PROFILER):
+    """
+    This function picks a move with root-parallel Monte Carlo tree search.
+    Every worker process searches the same position with its own random numbers until the time budget is used up,
+    then the visit counts of all workers are added together and the most visited move is played.
+    More CPU cores mean more games played, so the AI gets stronger on faster machines.
+    """
+    global MCTS_POOL
+    workers = workers or MCTS_WORKERS
+    if workers <= 1:
+        visits = mcts_search(board, player, time.time() + time_budget)
+    else:
+        if MCTS_POOL is None:
+            MCTS_POOL = ProcessPoolExecutor(max_workers=workers)
+            for future in [MCTS_POOL.submit(os.getpid) for _ in range(workers)]:
+                future.result()  # Wait until the workers have started, so starting them does not use up the time budget.
+        deadline = time.time() + max(time_budget - MCTS_MARGIN, 0.01)
+        bits = tuple(board.bits)
+        futures = [MCTS_POOL.submit(mcts_worker, board.size, board.win_length, bits, player, deadline,
+                                    random.getrandbits(64)) for _ in range(workers)]
+        visits = {}
+        for future in futures:
+            for cell, count in future.result().items():
+                visits[cell] = visits.get(cell, 0) + count
+    profiler.count("mcts_playouts", sum(visits.values()))
+    if not visits:  # No move was tried (for example, the game is already over): play a forced move or any free cell.
+        moves = board.winning_moves(player) or board.winning_moves(1 - player)
+        taken = board.bits[0] | board.bits[1]
+        return moves[0] if moves else next(cell for cell in center_order(board.size) if not taken >> cell & 1)
+    return max(visits, key=visits.get)
+
+TABLEBASE_MAGIC = b"TTTBASE1"  # The first 8 bytes of a tablebase file.
+TABLEBASE_HEADER = struct.Struct("<8sHHII")  # Magic, board size, win length, number of slots, number of positions.
+TABLEBASE_RECORD = struct.Struct("<QhH")  # Position key, score, best move (in the position's canonical orientation).
+TABLEBASE_EMPTY = 0xFFFF  # The move stored in an unused slot.
+TABLEBASE_UNKNOWN = -32768  # The score of a position whose move comes from a timed search, not from solving it.
+TABLEBASE_WIN = 1000  # A won position scores TABLEBASE_WIN minus the number of moves until the win.
+SIDE_KEY = 0x9E3779B97F4A7C15  # Mixed into the key when player 1 is to move.
+
+def tablebase_path(size, win_length):
+    """
+    This function returns where the tablebase for a board size and win length is stored (next to this file).
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), f"tablebase_{size}x{size}_{win_length}.bin")
+
+def position_hashes(board):
+    """
+    This function returns the Zobrist hashes of the 8 rotated and mirrored versions of the board.
+    """
+    keys = zobrist_keys(board.size)
+    hashes = [0] * 8
+    for who in range(2):
+        bits = board.bits[who]
+        while bits:
+            lowest = bits & -bits
+            bits ^= lowest
+            hashes = [h ^ key for h, key in zip(hashes, keys[who][lowest.bit_length() - 1])]
+    return hashes
+
+def position_key(hashes, player):
+    """
+    This function returns the key of a position with player 0 or 1 to move, and the symmetry that gives it.
+    All 8 rotated and mirrored versions of a position have the same key: the smallest of their Zobrist hashes.
+    """
+    key = min(hashes)
+    return key ^ SIDE_KEY if player else key, hashes.index(key)
+
+def write_tablebase(path, size, win_length, entries):
+    """
+    This function writes a tablebase file: a header and an open-addressing hash table with twice as many slots as positions.
+    entries maps each position key to a (score, canonical move) pair.
+    A position is found by starting at slot key % slots and moving to the next slot until the key or an empty slot turns up.
+    """
+    slots = 1
+    while slots < 2 * len(entries):
+        slots *= 2  # A power of two, so the slot is found with a bit mask.
+    table = bytearray(TABLEBASE_RECORD.pack(0, 0, TABLEBASE_EMPTY) * slots)
+    used = [False] * slots
+    for key, (score, move) in entries.items():
+        index = key & (slots - 1)
+        while used[index]:
+            index = (index + 1) & (slots - 1)
+        used[index] = True
+        TABLEBASE_RECORD.pack_into(table, index * TABLEBASE_RECORD.size, key, score, move)
+    with open(path, "wb") as file:
+        file.write(TABLEBASE_HEADER.pack(TABLEBASE_MAGIC, size, win_length, slots, len(entries)))
+        file.write(table)
+
+class Tablebase:
+    """
+    This class reads a tablebase file written by build_tablebase.py.
+    The file is memory-mapped, so opening it reads nothing but the header,
+    and looking up a position reads a slot or two straight from the file.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.size, self.win_length, self.slots, self.count = TABLEBASE_HEADER.unpack_from(self.data)
+            if magic != TABLEBASE_MAGIC or len(self.data) != TABLEBASE_HEADER.size + self.slots * TABLEBASE_RECORD.size:
+                raise ValueError(f"{path} is not a tablebase file.")
+        except (OSError, ValueError, struct.error):
+            self.file.close()
+            raise
+        self.mask = self.slots - 1
+        self.inverses = board_symmetries(self.size)[1]
+
+    def lookup(self, board, player):
+        """
+        This function returns (best cell, score) for player 0 or 1 to move, or None if the position is not in the table.
+        The score is TABLEBASE_UNKNOWN for positions that were not solved completely.
+        """
+        key, symmetry = position_key(position_hashes(board), player)
+        index = key & self.mask
+        while True:
+            offset = TABLEBASE_HEADER.size + index * TABLEBASE_RECORD.size
+            stored_key, score, move = TABLEBASE_RECORD.unpack_from(self.data, offset)
+            if move == TABLEBASE_EMPTY:
+                return None
+            if stored_key == key:
+                return self.inverses[symmetry][move], score  # Turn the stored move back to this orientation.
+            index = (index + 1) & self.mask
+
+@lru_cache(maxsize=None)
+def load_tablebase(size, win_length):
+    """
+    This function opens the tablebase for a board size and win length, or returns None if there is none.
+    """
+    try:
+        return Tablebase(tablebase_path(size, win_length))
+    except (OSError, ValueError, struct.error):
+        return None
+
+def ai_move(board, time_budget=AI_TIME_BUDGET, ai_player=1, profiler=NO_PROFILER):
+    """
+    This function handles the AI's move. If the position is in the tablebase made by build_tablebase.py, the stored move is played.
+    Otherwise it always takes a winning move and blocks the player's winning move.
+    Small boards and nearly full boards are searched exactly with alpha-beta pruning, so the AI plays perfectly there.
+    On large boards, where that is impossible, it uses Monte Carlo tree search on every CPU core for the whole time budget.
+    In the game the AI plays the second symbol (player 1); the simulator also lets it play player 0.
+    The profiler counts where each move came from and how many positions were searched.
+    """
+    tablebase = load_tablebase(board.size, board.win_length)
+    known = tablebase.lookup(board, ai_player) if tablebase else None
+    forced = board.winning_moves(ai_player) or board.winning_moves(1 - ai_player)
+    if known and known[1] != TABLEBASE_UNKNOWN:
+        cell = known[0]  # The position was solved ahead of time by build_tablebase.py.
+        profiler.count("ai_tablebase_moves")
+    elif forced:
+        cell = forced[0]  # Win now, or block the player.
+        profiler.count("ai_forced_moves")
+    elif known:
+        cell = known[0]  # An opening book move, found ahead of time with a long search.
+        profiler.count("ai_book_moves")
+    elif board.size == 3 or board.empty_count <= EXACT_SEARCH_CELLS:
+        cell = SEARCH_AI.best_move(board, ai_player, time_budget)
+        profiler.count("ai_alphabeta_moves")
+        profiler.count("alphabeta_nodes", SEARCH_AI.nodes)
+    else:
+        cell = mcts_move(board, ai_player, time_budget, profiler=profiler)
+        profiler.count("ai_mcts_moves")
+    return divmod(cell, board.size)  # Convert the cell number into row and column.
+
+def tic_tac_toe(profiler=NO_PROFILER):
     """
     This function runs the Tic Tac Toe game.
     It handles the game flow, player input, and checking for a winner.
+    Pass a Profiler to time each part of the game loop (see --profile).
     """
+    just_fix_windows_console()  # Lets the colors and cursor movements work in the Windows console too.
     print("Welcome to Advanced Tic Tac Toe!")  # Display the game welcome message.
 
     # Ask the player to input the size of the board (e.g., 3 for 3x3).
@@ -126,13 +1043,27 @@ def tic_tac_toe():
         except ValueError:
             print("Invalid input. Please enter a number.")  # Handle invalid input (non-number).
 
-    # Initialize the board with empty spaces.
-    board = [[' ' for _ in range(size)] for _ in range(size)]
-    scores = {'X': 0, 'O': 0}  # Initialize the scores dictionary for both players.
+    # Ask how many marks in a row win the game (the whole row by default, e.g. 5 for Gomoku on a 15x15 board).
+    while True:
+        try:
+            answer = input(f"Enter how many in a row win (3-{size}, default {size}): ").strip()
+            win_length = int(answer) if answer else size
+            if not 3 <= win_length <= size:
+                print(f"The number must be between 3 and {size}. Try again.")
+                continue
+            break
+        except ValueError:
+            print("Invalid input. Please enter a number.")
 
     # Ask each player to choose their symbol.
     symbol_x = input("Player X, choose your symbol (default 'X'): ") or 'X'
     symbol_o = input("Player O, choose your symbol (default 'O'): ") or 'O'
+    while symbol_o == symbol_x:  # The two players need different symbols.
+        symbol_o = input(f"'{symbol_x}' is already taken. Player O, choose another symbol: ") or 'O'
+
+    # Initialize the board with empty spaces.
+    board = Board(size, (symbol_x, symbol_o), win_length)
+    scores = {symbol_x: 0, symbol_o: 0}  # Initialize the scores dictionary for both players.
 
     # Ask the player to choose the game mode (single-player or two-player).
     mode = input("Enter '1' for single-player or '2' for two-player mode: ").strip()
@@ -140,12 +1071,21 @@ def tic_tac_toe():
         mode = input("Invalid choice. Enter '1' for single-player or '2' for two-player mode: ").strip()
 
     # Ask the player to set a time limit for each move.
-    time_limit = int(input("Enter the time limit for moves (in seconds): "))
+    while True:
+        try:
+            time_limit = int(input("Enter the time limit for moves (in seconds): "))
+            if time_limit <= 0:
+                print("The time limit must be at least 1 second. Try again.")
+                continue
+            break
+        except ValueError:
+            print("Invalid input. Please enter a number.")
 
     # Main game loop
     while True:
         current_player = symbol_x  # Player X always starts first.
-        print_board(board)  # Display the board at the start of each round.
+        with profiler.phase("render"):
+            print_board(board)  # Display the board at the start of each round.
 
         # Track the last move made for undo feature.
         last_move = None
@@ -153,40 +1093,49 @@ def tic_tac_toe():
         while True:
             if mode == '1' and current_player == symbol_o:  # If it's AI's turn in single-player mode.
                 print("AI is making its move...")  # Let the player know it's AI's turn.
-                row, col = ai_move(board)  # Get AI's move.
+                with profiler.phase("ai_move"):
+                    row, col = ai_move(board, time_limit, profiler=profiler)  # Get AI's move, thinking for the whole time limit.
             else:  # If it's the player's turn.
                 print(f"You have {time_limit} seconds to make a move.")  # Notify the player of the time limit.
-                row, col = player_move(board, current_player, time_limit)  # Get the player's move.
+                with profiler.phase("player_move"):
+                    row, col = player_move(board, current_player, time_limit)  # Get the player's move.
                 if row is None:  # If the player took too long, skip their turn.
                     current_player = symbol_o if current_player == symbol_x else symbol_x
                     continue
                 if input("Do you want to undo your last move? (yes/no): ").lower() == "yes" and last_move:
                     # If the player wants to undo the last move, do it.
-                    board[last_move[0]][last_move[1]] = ' '
+                    board.remove(*last_move)
                     print("Last move undone.")
                     continue
                 last_move = (row, col)  # Update the last move.
 
             # Update the board with the player's or AI's move.
-            board[row][col] = current_player
-            print_board(board)  # Display the updated board.
+            with profiler.phase("place"):
+                board.place(row, col, current_player)
+            profiler.count("moves")
 
-            # Check if there's a winner.
-            winner, positions = check_win(board)
+            # Check if there's a winner (only the lines through this move are checked).
+            with profiler.phase("check_win"):
+                winner, positions = check_win(board)
+            with profiler.phase("render"):
+                print_board(board, positions)  # Display the updated board, with the winning positions highlighted.
             if winner:
-                print_board(board, positions)  # Highlight the winning positions.
                 print(f"Player {winner} wins!")  # Announce the winner.
                 scores[winner] += 1  # Update the score of the winner.
                 break
 
             # Check if it's a draw (no winner).
-            if is_draw(board):
+            with profiler.phase("is_draw"):
+                draw = is_draw(board)
+            if draw:
                 print("It's a draw!")  # Announce the draw.
                 break
 
             # Switch turns.
             current_player = symbol_o if current_player == symbol_x else symbol_x
 
+        profiler.end_game(board_size=size, win_length=win_length, mode=mode, winner=winner)
+
         # Display the scores.
         print(f"Scores: {symbol_x} = {scores[symbol_x]}, {symbol_o} = {scores[symbol_o]}")
 
@@ -198,8 +1147,19 @@ def tic_tac_toe():
             break  # End the game.
 
         # Reset the board for a new game.
-        board = [[' ' for _ in range(size)] for _ in range(size)]
+        board = Board(size, (symbol_x, symbol_o), win_length)
 
 # Run the game.
 if __name__ == "__main__":
-    tic_tac_toe()  # Start the game when the script is run.
+    parser = argparse.ArgumentParser(description="Play Advanced Tic Tac Toe.")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="time the game loop and the AI, print a summary at the end, and save it to FILE (.json or .csv) if given")
+    args = parser.parse_args()
+
+    profiler = Profiler() if args.profile is not None else NO_PROFILER
+    tic_tac_toe(profiler)  # Start the game when the script is run.
+    if profiler.enabled:
+        print(profiler.summary())
+        if args.profile:
+            profiler.export(args.profile)
+            print(f"Profile saved to {args.profile}.")
@@ -0,0 +1,229 @@
+import argparse  # This imports argparse, which reads the command-line options.
+import json  # This imports json, which saves the results to a file.
+import os  # This imports the os module, which tells us how many CPU cores there are.
+import sys  # This imports sys, which sets the exit code.
+import time  # This imports time, which measures how many games are played per second.
+from concurrent.futures import ProcessPoolExecutor  # This imports a process pool, so batches run on every CPU core.
+from functools import partial  # This imports partial, which fills in the time budget of the 'search' player.
+
+import numpy as np  # This imports NumPy, which plays a whole batch of games at once.
+
+import main  # The game itself, for the 'search' player.
+
+# The four directions a line can go in: right, down, down-right and down-left.
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# The players that can take part in a simulation.
+PLAYERS = ("random", "greedy", "search")
+
+def window_slices(size, win_length, dr, dc):
+    """
+    This function returns, for one direction, the slices of the board that hold the 1st, 2nd, ... cell
+    of every line of win_length cells. Adding up the board at these slices gives, for every line at once,
+    how many marks are on it.
+    """
+    rows = size - dr * (win_length - 1)
+    cols = size - abs(dc) * (win_length - 1)
+    slices = []
+    for i in range(win_length):
+        row = dr * i
+        col = i if dc == 1 else 0 if dc == 0 else win_length - 1 - i
+        slices.append((slice(None), slice(row, row + rows), slice(col, col + cols)))
+    return slices
+
+def line_sums(marks, win_length):
+    """
+    This function counts the marks on every line of every board in the batch.
+    marks has the shape (games, size, size) and is 1 where the player has a mark.
+    It returns one array per direction, each with a count per line start.
+    """
+    size = marks.shape[1]
+    sums = []
+    for dr, dc in DIRECTIONS:
+        slices = window_slices(size, win_length, dr, dc)
+        total = marks[slices[0]].astype(np.int16)
+        for cells in slices[1:]:
+            total += marks[cells]
+        sums.append(total)
+    return sums
+
+def has_won(marks, win_length):
+    """
+    This function returns, for every board in the batch, whether the player has win_length marks in a row.
+    """
+    won = np.zeros(marks.shape[0], dtype=bool)
+    for total in line_sums(marks, win_length):
+        won |= (total == win_length).any(axis=(1, 2))
+    return won
+
+def completing_cells(mine, theirs, empty, win_length):
+    """
+    This function marks, for every board in the batch, the empty cells where the player would complete a line:
+    lines with win_length - 1 of the player's marks and none of the opponent's.
+    """
+    size = mine.shape[1]
+    cells = np.zeros(mine.shape, dtype=bool)
+    for (dr, dc), mine_total, theirs_total in zip(DIRECTIONS, line_sums(mine, win_length), line_sums(theirs, win_length)):
+        open_lines = (mine_total == win_length - 1) & (theirs_total == 0)
+        for cell_slice in window_slices(size, win_length, dr, dc):
+            cells[cell_slice] |= open_lines & empty[cell_slice]  # The empty cell of each open line.
+    return cells
+
+def random_policy(mine, theirs, empty, win_length, player, generator):
+    """
+    This function picks a random empty cell on every board in the batch.
+    It returns the chosen cells as numbers r * size + c.
+    """
+    scores = generator.random(empty.shape)
+    scores[~empty] = -1.0  # Taken cells are never chosen.
+    return scores.reshape(len(scores), -1).argmax(axis=1)
+
+def greedy_policy(mine, theirs, empty, win_length, player, generator):
+    """
+    This function plays like the first step of ai_move on every board in the batch at once:
+    it wins if it can, otherwise blocks the opponent's winning cell, otherwise plays a random empty cell.
+    """
+    scores = generator.random(empty.shape)
+    scores += 2.0 * completing_cells(mine, theirs, empty, win_length)  # Winning cells first...
+    scores += 1.0 * completing_cells(theirs, mine, empty, win_length)  # ...then blocking cells.
+    scores[~empty] = -1.0
+    return scores.reshape(len(scores), -1).argmax(axis=1)
+
+def search_policy(mine, theirs, empty, win_length, player, generator, time_budget=0.01):
+    """
+    This function asks the real game AI (ai_move) for a move on every board in the batch, one board at a time.
+    It is much slower than the other players, so use it with small numbers of games and a small time budget.
+    """
+    games, size = mine.shape[0], mine.shape[1]
+    moves = np.zeros(games, dtype=np.int64)
+    flat_mine, flat_theirs = mine.reshape(games, -1), theirs.reshape(games, -1)
+    for game in range(games):
+        board = main.Board(size, win_length=win_length)
+        for cell in np.flatnonzero(flat_mine[game]):
+            board.place_cell(int(cell), player)
+        for cell in np.flatnonzero(flat_theirs[game]):
+            board.place_cell(int(cell), 1 - player)
+        row, col = main.ai_move(board, time_budget, player)
+        moves[game] = row * size + col
+    return moves
+
+def play_batch(job):
+    """
+    This function plays one batch of games between player A and player B. It runs inside the worker processes.
+    All the boards are kept in one NumPy array of shape (games, size, size), with 0 for an empty cell,
+    1 for the first player's mark and 2 for the second player's mark, and every turn is played on all of them together.
+    In odd-numbered games player B moves first, so neither player always has the first move.
+
+    :param job: A tuple (games, size, win_length, player_a, player_b, seed, time_budget).
+    :return: A dictionary with the wins of A and B, the draws and the total number of moves.
+    """
+    games, size, win_length, player_a, player_b, seed, time_budget = job
+    generator = np.random.default_rng(seed)
+    main.MCTS_WORKERS = 1  # Each worker already has its own CPU core.
+    policies = {"random": random_policy, "greedy": greedy_policy,
+                "search": partial(search_policy, time_budget=time_budget)}
+
+    boards = np.zeros((games, size, size), dtype=np.int8)
+    flat_boards = boards.reshape(games, -1)
+    a_side = np.arange(games) % 2  # Which side (0 = moves first, 1 = moves second) player A plays in each game.
+    active = np.ones(games, dtype=bool)  # Games that are still going on.
+    winner = np.full(games, -1, dtype=np.int8)  # The side that won each game, or -1.
+    lengths = np.zeros(games, dtype=np.int64)
+
+    for turn in range(size * size):
+        side = turn % 2
+        for name, controls in ((player_a, a_side == side), (player_b, a_side != side)):
+            games_to_move = np.flatnonzero(active & controls)
+            if not len(games_to_move):
+                continue
+            current = boards[games_to_move]
+            mine, theirs, empty = current == side + 1, current == 2 - side, current == 0
+            moves = policies[name](mine, theirs, empty, win_length, side, generator)
+            flat_boards[games_to_move, moves] = side + 1
+            lengths[games_to_move] += 1
+
+            won = has_won(boards[games_to_move] == side + 1, win_length)
+            winner[games_to_move[won]] = side
+            active[games_to_move[won]] = False
+        if not active.any():
+            break
+
+    return {
+        "a_wins": int((winner == a_side).sum()),
+        "b_wins": int((winner == 1 - a_side).sum()),
+        "draws": int((winner < 0).sum()),
+        "moves": int(lengths.sum()),
+    }
+
+def simulate(games, size, win_length, player_a, player_b, batch_size=10_000, workers=None, seed=0, time_budget=0.01):
+    """
+    This function plays many games, split into batches that are spread over a process pool,
+    and adds up the results.
+
+    :return: A dictionary with the totals, the rates and the speed.
+    """
+    jobs = []
+    for index, start in enumerate(range(0, games, batch_size)):
+        jobs.append((min(batch_size, games - start), size, win_length, player_a, player_b, seed + index, time_budget))
+
+    start_time = time.perf_counter()
+    if (workers or os.cpu_count() or 1) <= 1 or len(jobs) == 1:
+        results = list(map(play_batch, jobs))  # No need for extra processes.
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(play_batch, jobs))
+    elapsed = time.perf_counter() - start_time
+
+    totals = {key: sum(result[key] for result in results) for key in ("a_wins", "b_wins", "draws", "moves")}
+
+    return dict(
+        totals,
+        games=games,
+        a_win_rate=totals["a_wins"] / games,
+        b_win_rate=totals["b_wins"] / games,
+        draw_rate=totals["draws"] / games,
+        average_length=totals["moves"] / games,
+        seconds=elapsed,
+        games_per_second=games / max(elapsed, 1e-9),
+    )
+
+def main_simulation(argv=None):
+    """
+    This function reads the command-line options, runs the simulation and prints the results.
+    """
+    parser = argparse.ArgumentParser(description="Play many Tic Tac Toe games without a screen and report the results.")
+    parser.add_argument("-n", "--games", type=int, default=100_000, help="number of games to play")
+    parser.add_argument("-s", "--size", type=int, default=3, help="size of the board (default 3)")
+    parser.add_argument("-k", "--win-length", type=int, help="marks in a row that win (default: the board size)")
+    parser.add_argument("-a", "--player-a", choices=PLAYERS, default="greedy", help="player A (default greedy)")
+    parser.add_argument("-b", "--player-b", choices=PLAYERS, default="random", help="player B (default random)")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="games played together in one NumPy batch")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="number of worker processes (default: all cores)")
+    parser.add_argument("--time-budget", type=float, default=0.01, help="seconds per move for the 'search' player")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random moves")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    win_length = args.win_length or args.size
+    if args.size < 3 or not 3 <= win_length <= args.size:
+        parser.error("the board size must be at least 3, and the win length between 3 and the board size")
+    if args.time_budget <= 0:
+        parser.error("the time budget must be more than 0 seconds")
+
+    results = simulate(args.games, args.size, win_length, args.player_a, args.player_b,
+                       args.batch_size, args.workers, args.seed, args.time_budget)
+
+    print(f"{args.games:,} games on a {args.size}x{args.size} board ({win_length} in a row), "
+          f"A = {args.player_a}, B = {args.player_b}, each moving first in half of the games")
+    print(f"A wins: {results['a_win_rate']:.2%}   B wins: {results['b_win_rate']:.2%}   draws: {results['draw_rate']:.2%}")
+    print(f"Average game length: {results['average_length']:.2f} moves")
+    print(f"Speed: {results['games_per_second']:,.0f} games/s ({results['seconds']:.2f} s with {args.workers} worker(s))")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+# Run the simulation if this file is executed directly.
+if __name__ == "__main__":
+    sys.exit(main_simulation())
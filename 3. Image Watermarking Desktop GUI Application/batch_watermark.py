@@ -0,0 +1,185 @@
+# Import the libraries for the command-line tool
+import argparse  # To read the command-line options
+import glob  # To expand file patterns like 'photos/*.jpg'
+import os  # To work with files and folders
+import sys  # To set the exit code
+import time  # To measure the speed
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait  # To use every CPU core
+
+from main import (ENCODER_PRESETS, MEMORY_LIMIT, PATTERN_ANGLE, POSITIONS, apply_watermark, decoded_size, keep_options,
+                  open_large_image, patch_watermark, selected_font)  # The same watermark function the GUI uses
+
+# The image files that are picked up inside folders
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+
+# Function to find all the images that should be watermarked
+def find_images(paths, recursive=False):
+    """
+    Expands folders and glob patterns into image files, one at a time.
+    The files are yielded as they are found, so even a folder with hundreds of thousands of images
+    does not have to be listed completely before the work starts.
+
+    :param paths: Folders, files or glob patterns given on the command line.
+    :param recursive: Whether to look inside subfolders as well.
+    :return: A generator of (file path, folder it was found in) pairs. The folder is None for single files.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, subfolders, files in os.walk(path):
+                for name in files:
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(folder, name), path
+                if not recursive:
+                    break  # Only the top folder.
+        elif os.path.isfile(path):
+            yield path, None
+        else:
+            for file in glob.iglob(path, recursive=recursive):  # Treat everything else as a pattern.
+                if os.path.isfile(file):
+                    yield file, None
+
+
+# Function to decide where the watermarked image is written
+def output_path(input_path, base_folder, output_dir=None, suffix="_watermarked"):
+    """
+    Builds the name of the output file for an input image.
+    With an output folder, the images keep their names and their subfolders. Without one,
+    the watermarked image is written next to the original with a suffix, e.g. 'photo_watermarked.jpg'.
+    """
+    if output_dir is None:
+        stem, extension = os.path.splitext(input_path)
+        return stem + suffix + extension
+    relative = os.path.relpath(input_path, base_folder) if base_folder else os.path.basename(input_path)
+    return os.path.join(output_dir, relative)
+
+
+# Function to make sure an output file does not destroy anything
+def check_output(input_path, output_file, seen, force=False):
+    """
+    Checks that an image may be written to output_file: it must not be the input image itself,
+    it must not be the output of another image of this run, and it must not exist yet unless force is set.
+
+    :param seen: The set of output paths used so far. The path is added to it when it may be used.
+    :return: A message saying why the output cannot be written, or None if it can.
+    """
+    real_path = os.path.normcase(os.path.realpath(output_file))
+    if real_path == os.path.normcase(os.path.realpath(input_path)):
+        return f"{output_file} is the image itself; use another output folder"
+    if real_path in seen:
+        return f"{output_file} is also the output of another image"
+    if os.path.exists(output_file) and not force:
+        return f"{output_file} already exists (use --force to overwrite it)"
+    seen.add(real_path)
+    return None
+
+
+# Function that watermarks one image. It runs inside the worker processes.
+def watermark_file(job):
+    """
+    Watermarks a single image and saves it in the same format as the original.
+    JPEG images keep their quality settings, and the EXIF data and color profile are kept as well.
+    Images that would need more than memory_limit bytes to decode are patched in place with patch_watermark.
+
+    :param job: A tuple (input_path, output_path, text, position, font_size, font_color, font_path, opacity, angle,
+                preset, memory_limit). The preset is a name from ENCODER_PRESETS, or None to keep the original JPEG settings.
+    :return: A tuple (input_path, output_path, bytes_read, seconds, error). error is None on success.
+    """
+    input_path, output_file, text, position, font_size, font_color, font_path, opacity, angle, preset, memory_limit = job
+    start_time = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        image = open_large_image(input_path)
+        if decoded_size(image, position) > memory_limit:
+            image.close()
+            patch_watermark(input_path, output_file, text, position, font_size, font_color, font_path, opacity)
+            return input_path, output_file, os.path.getsize(input_path), time.perf_counter() - start_time, None
+        image = apply_watermark(image, text, position, font_size, font_color, font_path, opacity, angle)
+        image.save(output_file, format=image.format, **keep_options(image, preset))
+        size = os.path.getsize(input_path)
+    except (OSError, ValueError) as e:
+        return input_path, output_file, 0, time.perf_counter() - start_time, str(e)
+    return input_path, output_file, size, time.perf_counter() - start_time, None
+
+
+# Function to print the result of one image and update the totals
+def report(result, done, failed, total_size, quiet):
+    input_path, output_file, size, seconds, error = result
+    if error:
+        print(f"FAILED {input_path}: {error}", file=sys.stderr)
+        return done, failed + 1, total_size
+    if not quiet:
+        print(f"{input_path} -> {output_file} ({seconds:.3f} s)")
+    return done + 1, failed, total_size + size
+
+
+# Main function for the command-line tool
+def main(argv=None):
+    """
+    Watermarks many images in parallel.
+
+    :param argv: The command-line arguments (defaults to sys.argv).
+    :return: The exit code (0 if every image was watermarked).
+    """
+    parser = argparse.ArgumentParser(description="Add a text watermark to many images in parallel.")
+    parser.add_argument("paths", nargs="+", help="image files, folders or glob patterns")
+    parser.add_argument("-t", "--text", required=True, help="the watermark text")
+    parser.add_argument("-p", "--position", choices=POSITIONS, default="bottom-right", help="where to put the watermark (default bottom-right)")
+    parser.add_argument("-f", "--font", default=selected_font, help=f"font file (default {selected_font})")
+    parser.add_argument("-s", "--size", type=int, default=30, help="font size (default 30)")
+    parser.add_argument("-c", "--color", default="#FFFFFF", help="text color, e.g. '#FFFFFF' or 'red' (default white)")
+    parser.add_argument("--opacity", type=int, default=100, help="opacity of the text in percent (default 100 = solid)")
+    parser.add_argument("--angle", type=float, default=PATTERN_ANGLE, help=f"angle of the text for -p tiled, in degrees (default {PATTERN_ANGLE})")
+    parser.add_argument("--preset", choices=list(ENCODER_PRESETS), help="encoder preset (default: keep the original JPEG settings)")
+    parser.add_argument("--memory-limit", type=int, default=MEMORY_LIMIT // 2**20,
+                        help=f"MB one worker may use to decode an image; larger images are patched in place (default {MEMORY_LIMIT // 2**20})")
+    parser.add_argument("-o", "--output-dir", help="folder for the watermarked images (default: next to each image, with a suffix)")
+    parser.add_argument("--suffix", default="_watermarked", help="added to the file name when there is no output folder")
+    parser.add_argument("--force", action="store_true", help="overwrite watermarked images that already exist")
+    parser.add_argument("-r", "--recursive", action="store_true", help="also look inside subfolders")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="number of worker processes (default: all cores)")
+    parser.add_argument("--max-in-flight", type=int, help="images queued or being processed at once (default: 4 per worker)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    max_in_flight = args.max_in_flight or args.workers * 4
+    images = find_images(args.paths, args.recursive)
+    if not args.output_dir:
+        # Skip the images written by an earlier run into the same folders.
+        images = ((path, base) for path, base in images if not os.path.splitext(path)[0].endswith(args.suffix))
+
+    done = failed = total_size = 0
+    seen = set()
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        pending = set()
+        for path, base in images:
+            output_file = output_path(path, base, args.output_dir, args.suffix)
+            # Never write over the original, over another image's output or (without --force) over an existing file.
+            error = check_output(path, output_file, seen, args.force)
+            if error:
+                done, failed, total_size = report((path, output_file, 0, 0.0, error), done, failed, total_size, args.quiet)
+                continue
+            job = (path, output_file, args.text, args.position, args.size, args.color, args.font, args.opacity / 100,
+                   args.angle, args.preset, args.memory_limit * 2**20)
+            # Only a limited number of images wait in the pool, so the memory use stays the same for any number of files.
+            if len(pending) >= max_in_flight:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done, failed, total_size = report(future.result(), done, failed, total_size, args.quiet)
+            pending.add(executor.submit(watermark_file, job))
+        for future in wait(pending).done:
+            done, failed, total_size = report(future.result(), done, failed, total_size, args.quiet)
+    elapsed = time.perf_counter() - start_time
+
+    if not done + failed:
+        print("No images found.")
+        return 1
+    print(f"Watermarked {done} of {done + failed} images ({total_size / 1e6:.2f} MB) in {elapsed:.2f} s "
+          f"with {args.workers} worker(s): {done / max(elapsed, 1e-9):.1f} images/s")
+    return 1 if failed else 0
+
+
+# Run the command-line tool if this file is executed directly
+if __name__ == "__main__":
+    sys.exit(main())
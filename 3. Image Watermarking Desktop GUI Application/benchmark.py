@@ -0,0 +1,221 @@
+# Import the libraries for the benchmark
+import argparse  # To read the command-line options
+import io  # To encode the images in memory
+import json  # To store and compare baselines
+import multiprocessing  # To start every case in a new interpreter
+import os  # To build the paths of the test images
+import sys  # To set the exit code
+import tempfile  # For a folder to keep the test images in
+import time  # To measure the speed
+from concurrent.futures import ProcessPoolExecutor  # To measure every case in a fresh process
+
+from PIL import Image, ImageDraw  # Pillow for making the test images
+
+import main  # The watermark pipeline (the window is only created by main.main(), so no display is needed)
+
+try:
+    import resource  # To read the peak memory on Linux and macOS
+except ImportError:
+    resource = None  # Windows
+
+# The sizes of the test images
+IMAGE_SIZES = {"small": (640, 480), "medium": (1920, 1080), "large": (6000, 4000)}
+
+# The formats the test images are saved in, with their file extensions
+FORMATS = {"PNG": ".png", "JPEG": ".jpg", "BMP": ".bmp"}
+
+# The phases of the pipeline, in the order they run
+PHASES = ("decode", "font", "measure", "draw", "paste", "encode")
+
+
+# Function to make a test image
+def make_image(size):
+    """
+    Makes an image that is the same on every run: two color gradients and a Mandelbrot fractal.
+    The fractal has fine detail, so the image does not compress unrealistically well.
+    """
+    red = Image.linear_gradient("L").resize(size)
+    green = Image.linear_gradient("L").rotate(90).resize(size)
+    blue = Image.effect_mandelbrot(size, (-2.2, -1.3, 0.8, 1.3), 100)
+    return Image.merge("RGB", (red, green, blue))
+
+
+# Function to read the peak memory of this process
+def peak_rss():
+    """
+    Returns the largest amount of memory this process has used so far, in bytes.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # Linux reports kilobytes, macOS bytes
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+    get_current_process.restype = wintypes.HANDLE
+    get_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+    get_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+    get_memory_info(get_current_process(), ctypes.byref(counters), counters.cb)
+    return counters.PeakWorkingSetSize
+
+
+# Function that measures one image. It runs in its own process, so the peak memory belongs to this case only.
+def run_case(job):
+    """
+    Times every phase of watermarking and saving one image, the way save_watermarked() does it.
+    The font and stamp caches are cleared before every run, so 'font' and 'draw' show the cost
+    of the first image. In batch use only 'decode', 'paste' and 'encode' are paid for every image.
+
+    :param job: A tuple (image_path, image_format, text, position, font_path, font_size, preset, repeat).
+    :return: A dictionary with the best time of each phase, the totals, the output size and the peak memory.
+    """
+    image_path, image_format, text, position, font_path, font_size, preset, repeat = job
+    best = dict.fromkeys(PHASES, float("inf"))
+    for _ in range(repeat):
+        main.load_font.cache_clear()
+        main.watermark_stamp.cache_clear()
+        main.pattern_mask.cache_clear()
+        times = {}
+
+        start_time = time.perf_counter()
+        image = Image.open(image_path)
+        image.load()
+        times["decode"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        font = main.load_font(font_path, font_size)
+        times["font"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font)
+        times["measure"] = time.perf_counter() - start_time
+
+        # Drawing the stamp (and the pattern mask for 'tiled'). This measures the text once more, which is tiny.
+        start_time = time.perf_counter()
+        main.watermark_stamp(text, font_path, font_size, "#FFFFFF", 0.5)
+        if position == "tiled":
+            main.pattern_mask(text, font_path, font_size, 0.5, main.PATTERN_ANGLE, image.size)
+        times["draw"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        image = main.apply_watermark(image, text, position, font_size, "#FFFFFF", font_path, 0.5)
+        times["paste"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, **main.encoder_options(image_format, preset))
+        times["encode"] = time.perf_counter() - start_time
+
+        for phase in PHASES:
+            best[phase] = min(best[phase], times[phase])
+
+    return {
+        "phases": best,
+        "first_image": sum(best.values()),
+        "per_image": best["decode"] + best["paste"] + best["encode"],
+        "megapixels": image.width * image.height / 1e6,
+        "output_bytes": len(buffer.getvalue()),
+        "peak_rss": peak_rss(),
+    }
+
+
+# Function to compare the results with a stored baseline
+def find_regressions(results, baseline, threshold):
+    """
+    Lists every phase that is slower, and every case that uses more memory, than the baseline by more than the threshold.
+    Very short phases get 1 ms of slack, so timer noise is not reported.
+
+    :param results: The new results, keyed by 'size/format/position'.
+    :param baseline: The stored results, in the same form.
+    :param threshold: The allowed change, for example 0.2 for 20%.
+    :return: A list of messages, one per regression.
+    """
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for phase in PHASES:
+            new_time, old_time = result["phases"][phase], old["phases"][phase]
+            if new_time > old_time * (1 + threshold) + 0.001:
+                regressions.append(f"{key} {phase}: {new_time * 1000:.1f} ms, baseline {old_time * 1000:.1f} ms")
+        if result["peak_rss"] > old["peak_rss"] * (1 + threshold) + 16 * 1024 * 1024:
+            regressions.append(f"{key}: peak RSS {result['peak_rss'] / 1e6:.1f} MB, baseline {old['peak_rss'] / 1e6:.1f} MB")
+    return regressions
+
+
+# Main function for the benchmark
+def main_benchmark(argv=None):
+    """
+    Runs the benchmark and prints a table of the results.
+
+    :param argv: The command-line arguments (defaults to sys.argv).
+    :return: The exit code (1 if a regression was found).
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the phases of the watermark pipeline.")
+    parser.add_argument("--sizes", nargs="+", choices=list(IMAGE_SIZES), default=["small", "medium"], help="image sizes to test")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS), help="image formats to test")
+    parser.add_argument("-t", "--text", default="© Benchmark 2026", help="the watermark text")
+    parser.add_argument("-p", "--position", choices=main.POSITIONS, default="bottom-right", help="where to put the watermark")
+    parser.add_argument("-f", "--font", default=main.selected_font, help=f"font file (default {main.selected_font})")
+    parser.add_argument("-s", "--size", type=int, default=48, help="font size (default 48)")
+    parser.add_argument("--preset", choices=list(main.ENCODER_PRESETS), default="balanced", help="encoder preset (default balanced)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (the best one counts)")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare the results with this baseline JSON file")
+    parser.add_argument("--save-baseline", help="store the results as a new baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression against the baseline (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"Watermark '{args.text}' at {args.position}, font size {args.size}, '{args.preset}' encoder preset")
+    print(f"{'size':<8}{'format':<7}{'MP':>6}" + "".join(f"{phase + ' ms':>11}" for phase in PHASES)
+          + f"{'first ms':>11}{'per img ms':>11}{'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            image = make_image(IMAGE_SIZES[size])
+            for image_format in args.formats:
+                image_path = os.path.join(folder, size + FORMATS[image_format])
+                image.save(image_path, format=image_format)
+                job = (image_path, image_format, args.text, args.position, args.font, args.size, args.preset, args.repeat)
+                # A new interpreter (not a fork), so the peak memory is this case's. A forked process would start with
+                # this process's high-water mark, which includes making the test image.
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    result = executor.submit(run_case, job).result()
+                results[f"{size}/{image_format}/{args.position}"] = result
+                print(f"{size:<8}{image_format:<7}{result['megapixels']:>6.1f}"
+                      + "".join(f"{result['phases'][phase] * 1000:>11.1f}" for phase in PHASES)
+                      + f"{result['first_image'] * 1000:>11.1f}{result['per_image'] * 1000:>11.1f}{result['peak_rss'] / 1e6:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Saved baseline to {args.save_baseline}.")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}.")
+    return 0
+
+
+# Run the benchmark if this file is executed directly
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
@@ -1,46 +1,352 @@
 # Import necessary libraries for GUI and image processing
+import io  # To encode the saved image in memory
+import os  # To check when an image file was last changed
+import shutil  # To copy very large images without loading them
+import threading  # To cancel a save that runs in the background
 import tkinter as tk  # Tkinter for GUI
-from tkinter import filedialog, messagebox, colorchooser  # For file dialog, messages, and color picking
-from PIL import Image, ImageDraw, ImageFont, ImageTk  # Pillow for image manipulation
+from concurrent.futures import ThreadPoolExecutor  # To draw the preview without freezing the window
+from tkinter import filedialog, messagebox, colorchooser, ttk  # For file dialog, messages, color picking and the progress bar
+from functools import lru_cache  # To remember the fonts and watermark stamps that were used last
+from PIL import Image, ImageColor, ImageDraw, ImageFont, ImageTk  # Pillow for image manipulation
 
+# Global variables to store the state
+original_image_path = None  # Variable to store the image path
+selected_font = "arial.ttf"  # Default font path (Arial)
 
-# Function to add watermark to the image
-def add_watermark(image_path, watermark_text, position, font_size, font_color):
+# The places where the watermark can be put. 'tiled' repeats the text over the whole image at an angle.
+POSITIONS = ("top-left", "top-right", "bottom-left", "bottom-right", "tiled")
+
+# Settings of the 'tiled' pattern
+PATTERN_ANGLE = 30  # Degrees the text is turned (counterclockwise)
+PATTERN_GAP = 2.0  # Space between the repeated texts, in font sizes
+
+# Settings of the live preview
+PREVIEW_SIZE = (400, 400)  # The largest size of the preview
+PREVIEW_DELAY = 150  # Milliseconds to wait after a change before the preview is drawn again
+PREVIEW_POLL = 20  # Milliseconds between checks whether the preview is ready
+preview_executor = ThreadPoolExecutor(max_workers=1)  # One thread that draws the previews, one at a time
+preview_timer = None  # The preview that is waiting to be drawn
+preview_generation = 0  # Counts the previews, so only the newest one is shown
+
+# Settings of saving. Saving runs in its own thread, so the window does not freeze on large images.
+SAVE_POLL = 100  # Milliseconds between updates of the progress bar
+save_executor = ThreadPoolExecutor(max_workers=1)  # One thread that saves the images
+save_progress = None  # The progress of the save that is running
+
+# Images that would need more memory than this when decoded are watermarked in large-image mode,
+# which only decodes the area under the text (see patch_watermark)
+MEMORY_LIMIT = 1024 * 1024 * 1024  # 1 GB
+
+# Held while Pillow's size limit (Image.MAX_IMAGE_PIXELS) is read or switched off, because it is shared by all threads
+PIXEL_LIMIT_LOCK = threading.Lock()
+
+# Encoder settings to choose from: 'fast' saves quickly, 'smallest' makes the smallest files but takes longer.
+ENCODER_PRESETS = {
+    "fast": {
+        "JPEG": {"quality": 90, "optimize": False, "progressive": False, "subsampling": 2},
+        "PNG": {"compress_level": 1},
+    },
+    "balanced": {
+        "JPEG": {"quality": 90, "optimize": True, "progressive": False, "subsampling": 2},
+        "PNG": {"compress_level": 6},
+    },
+    "smallest": {
+        "JPEG": {"quality": 80, "optimize": True, "progressive": True, "subsampling": 2},
+        "PNG": {"compress_level": 9, "optimize": True},
+    },
+}
+
+
+# Function to load a font. The last fonts used are remembered, so a font file is only read once.
+@lru_cache(maxsize=16)
+def load_font(font_path, font_size):
     """
-    This function adds a watermark (text) to an image at the specified position with chosen font size and color.
+    Loads a TrueType or OpenType font at the given size.
+    The default font is used if the font file cannot be loaded.
     """
-    # Open the image from the provided file path
-    original_image = Image.open(image_path)
-    width, height = original_image.size  # Get the image width and height
-
-    # Create a drawing context to modify the image
-    drawing = ImageDraw.Draw(original_image)
-
-    # Load the font for the watermark (default font used if there's an issue)
     try:
-        font = ImageFont.truetype(selected_font, font_size)
+        return ImageFont.truetype(font_path, font_size)
     except IOError:
-        font = ImageFont.load_default()  # Use the default font if the custom font fails
+        return ImageFont.load_default()  # Use the default font if the custom font fails
 
-    # Calculate the size of the watermark text to position it properly
-    bbox = drawing.textbbox((0, 0), watermark_text, font=font)  # Get bounding box of text
-    text_width = bbox[2] - bbox[0]  # Width of the text
-    text_height = bbox[3] - bbox[1]  # Height of the text
 
-    # Set the position for the watermark based on user selection
+# Function to make the watermark stamp. The last stamps used are remembered, so in batch use the text is drawn only once.
+@lru_cache(maxsize=32)
+def watermark_stamp(watermark_text, font_path, font_size, font_color, opacity=1.0):
+    """
+    Draws the watermark text once on a transparent image that is just big enough for it.
+
+    :param opacity: How opaque the text is, from 0.0 (invisible) to 1.0 (solid).
+    :return: A tuple (stamp, offset). The stamp is an RGBA image, and offset is where the text's bounding box
+             starts relative to the point the text is drawn at.
+    """
+    font = load_font(font_path, font_size)
+    bbox = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), watermark_text, font=font)  # Get bounding box of text
+    size = (max(bbox[2] - bbox[0], 1), max(bbox[3] - bbox[1], 1))
+
+    # Draw the text in white on black to get how much each pixel is covered by the text (the alpha channel).
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), watermark_text, font=font, fill=255)
+    if opacity < 1.0:
+        mask = mask.point(lambda value: round(value * max(opacity, 0.0)))
+
+    stamp = Image.new("RGBA", size, ImageColor.getrgb(font_color)[:3] + (0,))
+    stamp.putalpha(mask)
+    return stamp, (bbox[0], bbox[1])
+
+
+# Function to work out where the watermark goes
+def watermark_position(position, width, height, text_width, text_height):
+    """
+    Returns the top-left corner of the text for one of the POSITIONS on an image of the given size.
+    """
     if position == "top-left":
-        position = (10, 10)  # 10px from the top-left corner
+        return (10, 10)  # 10px from the top-left corner
     elif position == "top-right":
-        position = (width - text_width - 10, 10)  # 10px from the top-right corner
+        return (width - text_width - 10, 10)  # 10px from the top-right corner
     elif position == "bottom-left":
-        position = (10, height - text_height - 10)  # 10px from the bottom-left corner
-    elif position == "bottom-right":
-        position = (width - text_width - 10, height - text_height - 10)  # 10px from the bottom-right corner
+        return (10, height - text_height - 10)  # 10px from the bottom-left corner
+    return (width - text_width - 10, height - text_height - 10)  # 10px from the bottom-right corner
 
-    # Apply the watermark text onto the image at the calculated position
-    drawing.text(position, watermark_text, font=font, fill=font_color)
 
-    return original_image  # Return the image with the watermark added
+# Function to make the mask of the 'tiled' pattern. The last masks are remembered for each image size.
+@lru_cache(maxsize=4)
+def pattern_mask(watermark_text, font_path, font_size, opacity, angle, size):
+    """
+    Builds a grayscale mask of the text repeated over an image of the given size.
+    The text is drawn and turned only once. The turned text is put in one tile, with every second row
+    shifted by half a tile, and the tile is repeated by copying the mask onto itself, doubling it each time.
+    So even a very large mask takes only a few dozen pastes.
+
+    :param size: The (width, height) of the image.
+    :return: An 'L' image where 255 means the text fully covers the pixel.
+    """
+    text_mask = watermark_stamp(watermark_text, font_path, font_size, "white")[0].getchannel("A")
+    text_mask = text_mask.rotate(angle, resample=Image.BICUBIC, expand=True)
+    if opacity < 1.0:
+        # The opacity is applied after turning, because smooth turning can make edges slightly brighter than the text.
+        text_mask = text_mask.point(lambda value: round(value * max(opacity, 0.0)))
+    gap = round(font_size * PATTERN_GAP)
+    cell_width, cell_height = text_mask.width + gap, text_mask.height + gap
+
+    # One tile: the text, and below it the text again shifted by half a tile
+    tile = Image.new("L", (cell_width, 2 * cell_height))
+    tile.paste(text_mask, (0, 0))
+    tile.paste(text_mask, (cell_width // 2, cell_height))
+    tile.paste(text_mask, (cell_width // 2 - cell_width, cell_height))  # The part that wraps around
+
+    # Repeat the tile to the right, then downwards
+    mask = Image.new("L", size)
+    mask.paste(tile, (0, 0))
+    width = tile.width
+    while width < size[0]:
+        mask.paste(mask.crop((0, 0, width, tile.height)), (width, 0))
+        width *= 2
+    height = tile.height
+    while height < size[1]:
+        mask.paste(mask.crop((0, 0, size[0], height)), (0, height))
+        height *= 2
+    return mask
+
+
+# Function to add watermark to the image
+def add_watermark(image_path, watermark_text, position, font_size, font_color, font_path=None, opacity=1.0,
+                  angle=PATTERN_ANGLE):
+    """
+    This function adds a watermark (text) to an image at the specified position with chosen font size and color.
+    The font is the one chosen in the GUI, unless a font file is given with font_path.
+    It does not need the GUI, so it can also be used from scripts such as batch_watermark.py.
+    """
+    # Open the image from the provided file path
+    original_image = open_checked_image(image_path)
+    return apply_watermark(original_image, watermark_text, position, font_size, font_color, font_path, opacity, angle)
+
+
+# Function to put the watermark on an image that is already open
+def apply_watermark(image, watermark_text, position, font_size, font_color, font_path=None, opacity=1.0,
+                    angle=PATTERN_ANGLE):
+    """
+    Puts the cached watermark stamp on the image with a single paste.
+    For the 'tiled' position the cached pattern mask is blended over the whole image in one pass,
+    with the text turned by angle degrees.
+    Images whose mode cannot take a colored stamp (like palette images) are converted to RGB or RGBA first.
+    The image is changed in place and returned.
+    """
+    font_path = font_path or selected_font
+    if image.mode not in ("RGB", "L", "RGBA"):
+        has_alpha = image.mode.endswith("A") or "transparency" in image.info
+        image_format = image.format
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        image.format = image_format  # Keep the original format, so the image is saved the same way.
+
+    if position == "tiled":
+        mask = pattern_mask(watermark_text, font_path, font_size, opacity, angle, image.size)
+        if image.mode == "RGBA":
+            overlay = Image.new("RGBA", image.size, ImageColor.getrgb(font_color)[:3] + (0,))
+            overlay.putalpha(mask)
+            image.alpha_composite(overlay)  # Keep the image's own transparency
+        else:
+            image.paste(ImageColor.getcolor(font_color, image.mode), (0, 0) + image.size, mask)
+        return image
+
+    stamp, (offset_x, offset_y) = watermark_stamp(watermark_text, font_path, font_size, font_color, opacity)
+    text_width, text_height = stamp.size
+    x, y = watermark_position(position, image.width, image.height, text_width, text_height)
+    box = (x + offset_x, y + offset_y)  # Where the text's bounding box starts
+    paste_stamp(image, stamp, box)
+    return image  # Return the image with the watermark added
+
+
+# Function to paste a watermark stamp onto an image
+def paste_stamp(image, stamp, box):
+    """
+    Pastes the stamp with its top-left corner at box. The stamp's alpha channel says how much of the text shows through.
+    On transparent (RGBA) images the stamp is blended with alpha_composite, so the image's own transparency is kept.
+    """
+    if image.mode == "RGBA":
+        area = (box[0], box[1], box[0] + stamp.width, box[1] + stamp.height)
+        region = image.crop(area)
+        region.alpha_composite(stamp)
+        image.paste(region, area)
+    else:
+        image.paste(stamp, box, stamp)
+
+
+# Function to open an image with Pillow's size limit
+def open_checked_image(image_path):
+    """
+    Opens an image file without decoding it, with Pillow's usual size limit.
+    If open_large_image() has switched the limit off in another thread, this waits until it is back on.
+    """
+    with PIXEL_LIMIT_LOCK:
+        return Image.open(image_path)
+
+
+# Function to open an image without Pillow's size limit. The memory ceiling (MEMORY_LIMIT) is checked instead.
+def open_large_image(image_path):
+    """
+    Opens an image file without decoding it. Pillow refuses to open images above about 180 megapixels,
+    to protect against "decompression bombs". Large scans are expected here, so that check is replaced
+    by comparing decoded_size() with the memory ceiling before anything is decoded.
+    The limit is only switched off while PIXEL_LIMIT_LOCK is held, so images opened with open_checked_image()
+    in other threads (like the preview) are still checked.
+    """
+    with PIXEL_LIMIT_LOCK:
+        pixel_limit = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            return Image.open(image_path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = pixel_limit
+
+
+# Function to estimate how much memory an image needs while it is watermarked
+def decoded_size(image, position=None):
+    """
+    Returns the number of bytes Pillow needs to decode the image and watermark it with apply_watermark().
+    Pillow stores 1 byte per pixel for single-band images like 'L' and 'P', and 4 bytes for the others.
+    Images in other modes than RGB, L and RGBA are converted to RGB or RGBA (4 bytes per pixel) while the
+    decoded original is still held, and the 'tiled' position adds a full-size mask and, for RGBA, an overlay.
+
+    :param image: An opened image that has not been decoded yet.
+    :param position: The watermark position, or None if it is not known yet.
+    """
+    pixels = image.width * image.height
+    size = pixels * (1 if image.mode in ("1", "L", "P") else 4)  # The decoded image
+    mode = image.mode
+    if mode not in ("RGB", "L", "RGBA"):
+        mode = "RGBA" if mode.endswith("A") or "transparency" in image.info else "RGB"
+        size += pixels * 4  # The converted copy
+    if position == "tiled":
+        size += pixels  # The pattern mask
+        if mode == "RGBA":
+            size += pixels * 4  # The colored overlay that is blended over the image
+    return size
+
+
+# Function to find where the pixels of an area are stored in an image file
+def raw_pieces(image, area):
+    """
+    Works out, for every row of the area, where its pixels are in the file. This is only possible for files
+    that store the pixels as plain rows without compression, like BMP, uncompressed TIFF and PPM.
+
+    :param image: An opened image that has not been decoded yet.
+    :param area: The (left, top, right, bottom) area to find.
+    :return: A list of (x, y, width, file offset, byte count, rawmode) pieces, or None if the file cannot be read this way.
+    """
+    if image.mode not in ("RGB", "RGBA", "L") or not image.tile:
+        return None
+    if len({tile[1] for tile in image.tile}) != len(image.tile):
+        return None  # Several tiles for the same area: the color channels are stored separately.
+
+    pieces = []
+    for codec, (x0, y0, x1, y1), offset, args in image.tile:
+        if codec != "raw":
+            return None  # The pixels are compressed
+        args = (args,) if isinstance(args, str) else tuple(args)
+        rawmode = args[0]
+        orientation = args[2] if len(args) > 2 else 1
+        try:
+            bytes_per_pixel = len(Image.new(image.mode, (1, 1)).tobytes("raw", rawmode))
+            if len(Image.new(image.mode, (8, 1)).tobytes("raw", rawmode)) != 8 * bytes_per_pixel:
+                return None  # Pixels that do not start on a whole byte
+        except ValueError:
+            return None  # Pillow cannot write this kind of raw pixels
+        stride = (args[1] if len(args) > 1 else 0) or (x1 - x0) * bytes_per_pixel
+
+        left, right = max(x0, area[0]), min(x1, area[2])
+        for y in range(max(y0, area[1]), min(y1, area[3])):
+            if left >= right:
+                break
+            row = y - y0 if orientation > 0 else y1 - 1 - y  # Bottom-up files (like BMP) store the last row first
+            file_offset = offset + row * stride + (left - x0) * bytes_per_pixel
+            pieces.append((left, y, right - left, file_offset, (right - left) * bytes_per_pixel, rawmode))
+    return pieces
+
+
+# Function to watermark a very large image by changing only the pixels under the text
+def patch_watermark(image_path, output_path, watermark_text, position, font_size, font_color, font_path=None, opacity=1.0):
+    """
+    Copies the image file to output_path and then rewrites only the area the watermark covers.
+    Only that area is decoded, so even a gigapixel scan needs just a few megabytes of memory.
+    The rest of the file is copied as it is, in small blocks.
+
+    :raises ValueError: If the file stores its pixels in a way that cannot be patched (for example JPEG or PNG).
+    """
+    if position == "tiled":
+        raise ValueError("The tiled pattern covers the whole image, so it cannot be used in large-image mode")
+    image = open_large_image(image_path)
+    stamp, (offset_x, offset_y) = watermark_stamp(watermark_text, font_path or selected_font, font_size, font_color, opacity)
+    x, y = watermark_position(position, image.width, image.height, stamp.width, stamp.height)
+    box = (x + offset_x, y + offset_y)
+    area = (max(box[0], 0), max(box[1], 0),
+            min(box[0] + stamp.width, image.width), min(box[1] + stamp.height, image.height))
+    pieces = raw_pieces(image, area)
+    image.close()
+    if pieces is None:
+        raise ValueError(f"{image.format} images with mode {image.mode} cannot be watermarked in large-image mode "
+                         "(only uncompressed TIFF, BMP and PPM files can)")
+
+    # Read the area from the file...
+    region = Image.new(image.mode, (max(area[2] - area[0], 0), max(area[3] - area[1], 0)))
+    with open(image_path, "rb") as file:
+        for left, top, width, file_offset, length, rawmode in pieces:
+            file.seek(file_offset)
+            row = Image.frombytes(image.mode, (width, 1), file.read(length), "raw", rawmode)
+            region.paste(row, (left - area[0], top - area[1]))
+
+    # ...put the watermark on it...
+    paste_stamp(region, stamp, (box[0] - area[0], box[1] - area[1]))
+
+    # ...then copy the file and write the changed rows back into the copy.
+    if os.path.abspath(output_path) != os.path.abspath(image_path):
+        shutil.copyfile(image_path, output_path)
+    with open(output_path, "r+b") as file:
+        for left, top, width, file_offset, length, rawmode in pieces:
+            row = region.crop((left - area[0], top - area[1], left - area[0] + width, top - area[1] + 1))
+            file.seek(file_offset)
+            file.write(row.tobytes("raw", rawmode))
+    return output_path
 
 
 # Function to open and load an image
@@ -56,26 +362,225 @@ def open_image():
         load_image(file_path)  # Load and display the image in the GUI
 
 
+# Function to load the preview of an image. The last previews are kept in memory, so they are decoded only once.
+@lru_cache(maxsize=8)
+def load_preview(image_path, modified_time=None):
+    """
+    Decodes an image at preview size.
+    JPEG images are decoded in draft mode, which lets the decoder scale them down by up to 8 times while reading,
+    so even a 50-megapixel photo loads in a fraction of a second.
+
+    :param modified_time: The time the file was last changed, so a changed file is not taken from the cache.
+    :return: A tuple (thumbnail, full size of the image).
+    """
+    image = open_checked_image(image_path)
+    full_size = image.size
+    image.draft("RGB", PREVIEW_SIZE)  # Only does something for JPEG images
+    has_alpha = image.mode.endswith("A") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    image.thumbnail(PREVIEW_SIZE)  # Resize the image to fit the GUI (400x400 max size)
+    return image, full_size
+
+
+# Function to draw the watermark on the preview. It runs in the preview thread, so the window does not freeze.
+def render_preview(image_path, watermark_text, position, font_size, font_color, font_path=None, opacity=1.0):
+    """
+    Draws the watermark, scaled down to the preview size, on a copy of the cached thumbnail.
+    The watermark is placed where it will be on the full-size image.
+
+    :return: The preview as a Pillow image.
+    """
+    thumbnail, (width, height) = load_preview(image_path, os.path.getmtime(image_path))
+    preview = thumbnail.copy()
+    if not watermark_text:
+        return preview
+
+    font_path = font_path or selected_font
+    scale = preview.width / width
+    if position == "tiled":
+        # The pattern is the same everywhere, so it is simply drawn with a smaller font.
+        return apply_watermark(preview, watermark_text, position, max(1, round(font_size * scale)), font_color,
+                               font_path, opacity)
+
+    # Work out where the text goes on the full-size image...
+    stamp, (offset_x, offset_y) = watermark_stamp(watermark_text, font_path, font_size, font_color, opacity)
+    x, y = watermark_position(position, width, height, stamp.width, stamp.height)
+    # ...then paste a smaller stamp at the same place on the preview.
+    small_stamp = watermark_stamp(watermark_text, font_path, max(1, round(font_size * scale)), font_color, opacity)[0]
+    paste_stamp(preview, small_stamp, (round((x + offset_x) * scale), round((y + offset_y) * scale)))
+    return preview
+
+
 # Function to load and display the image in the GUI
 def load_image(image_path):
     """
-    Loads the selected image and resizes it to fit the GUI preview area.
+    Shows the selected image with the watermark in the GUI preview area.
+    The image is decoded in the preview thread, so the window stays responsive even for very large images.
     """
-    global panel  # Reference to the image display panel
-    image = Image.open(image_path)  # Open the image file
-    image.thumbnail((400, 400))  # Resize the image to fit the GUI (400x400 max size)
-    img_display = ImageTk.PhotoImage(image)  # Convert the image to a format that can be displayed in Tkinter
+    update_preview()
+
+
+# Function to ask for a new preview. Changes that come quickly after each other (like typing) are combined into one.
+def schedule_preview(*args):
+    global preview_timer
+    if preview_timer is not None:
+        root.after_cancel(preview_timer)  # Forget the preview that was asked for before
+    preview_timer = root.after(PREVIEW_DELAY, update_preview)
+
+
+# Function to start drawing the preview with the current settings
+def update_preview():
+    """
+    Reads the settings from the widgets and draws the preview in the preview thread.
+    The result is picked up by show_preview() on the Tkinter thread, because Tkinter widgets
+    may only be changed from the thread that runs the window.
+    """
+    global preview_timer, preview_generation
+    preview_timer = None
+    if not original_image_path:
+        return
+    preview_generation += 1  # Previews that are still being drawn for older settings are not shown
+    future = preview_executor.submit(render_preview, original_image_path, watermark_entry.get(), position_var.get(),
+                                     size_slider.get(), color_var.get(), selected_font, opacity_slider.get() / 100)
+    root.after(PREVIEW_POLL, show_preview, future, preview_generation)
+
+
+# Function to show the preview once the preview thread has finished it
+def show_preview(future, generation):
+    if not future.done():
+        root.after(PREVIEW_POLL, show_preview, future, generation)  # Check again a bit later
+        return
+    if generation != preview_generation:
+        return  # The settings were changed while this preview was being drawn
+    try:
+        preview = future.result()
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        messagebox.showerror("Error", f"Unable to open image: {str(e)}")
+        return
+    img_display = ImageTk.PhotoImage(preview)  # Convert the image to a format that can be displayed in Tkinter
 
     # Display the image in the panel
     panel.config(image=img_display)
     panel.image = img_display  # Keep a reference to the image object
 
 
+# Exception raised in the save thread when the user cancels the save
+class SaveCancelled(Exception):
+    pass
+
+
+# Class that tells the window how far a save has got, and lets the window cancel it
+class SaveProgress:
+    """
+    Shared between the save thread and the window. The save thread sets the stage and the fraction done,
+    and the window reads them with root.after() to update the progress bar.
+    """
+
+    def __init__(self):
+        self.stage = "Starting"
+        self.fraction = 0.0  # How much of the save is done, from 0.0 to 1.0
+        self.bytes_written = 0  # Bytes the encoder has produced so far
+        self.cancelled = threading.Event()
+
+    def update(self, stage, fraction):
+        self.check()  # A cancelled save stops at the next stage
+        self.stage, self.fraction = stage, fraction
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise SaveCancelled()
+
+
+# Class for the in-memory file the encoder writes to. Every write counts the bytes and checks for a cancel.
+class ProgressBuffer(io.BytesIO):
+    def __init__(self, progress):
+        super().__init__()
+        self.progress = progress
+
+    def write(self, data):
+        self.progress.check()  # Stops the encoder in the middle when the save is cancelled
+        self.progress.bytes_written += len(data)
+        return super().write(data)
+
+
+# Function to get the encoder options of a preset for an image format
+def encoder_options(image_format, preset="balanced"):
+    """
+    Returns the Pillow save options of a preset from ENCODER_PRESETS for the given format ('JPEG', 'PNG', ...).
+    Formats without settings in the preset get no extra options.
+    """
+    return dict(ENCODER_PRESETS[preset].get(image_format, {}))
+
+
+# Function to get the save options that keep an image's metadata
+def keep_options(image, preset=None):
+    """
+    Returns the Pillow save options that keep the EXIF data, color profile and resolution of an image.
+    Without a preset, JPEG images also keep their original quality settings.
+    With a preset (a name from ENCODER_PRESETS), its encoder options are used instead.
+    """
+    options = {key: image.info[key] for key in ("exif", "icc_profile", "dpi") if key in image.info}
+    if preset:
+        options.update(encoder_options(image.format, preset))
+    elif image.format == "JPEG":
+        options.update(quality="keep", subsampling="keep")  # Re-use the original JPEG settings.
+    return options
+
+
+# Function to watermark an image and save it. It runs in the save thread, so the window does not freeze.
+def save_watermarked(image_path, save_path, watermark_text, position, font_size, font_color, font_path=None,
+                     opacity=1.0, preset="balanced", progress=None, memory_limit=MEMORY_LIMIT):
+    """
+    Adds the watermark to the full-size image and saves it with the encoder options of the preset.
+    The image is encoded in memory first, so a cancelled or failed save never leaves a half-written file.
+    Images that would need more than memory_limit bytes to decode are saved in large-image mode (see patch_watermark).
+
+    :param save_path: Where to save the image. The file extension decides the format.
+    :param progress: A SaveProgress to report to and to cancel with, or None.
+    :return: The path the image was saved to.
+    :raises SaveCancelled: If the save was cancelled.
+    :raises ValueError: If a large image cannot be saved within the memory limit.
+    """
+    progress = progress or SaveProgress()
+    progress.update("Opening image", 0.05)
+    image = open_large_image(image_path)
+    image_format = Image.registered_extensions().get(os.path.splitext(save_path)[1].lower(), image.format or "PNG")
+
+    if decoded_size(image, position) > memory_limit:
+        if image_format != image.format:
+            raise ValueError(f"The image needs {decoded_size(image, position) / 1e6:,.0f} MB to decode and watermark, more than the memory limit. "
+                             f"Save it as {image.format} to watermark it in large-image mode.")
+        progress.update("Patching the watermark area", 0.5)
+        return patch_watermark(image_path, save_path, watermark_text, position, font_size, font_color, font_path, opacity)
+    image.load()  # Decode the image
+
+    progress.update("Adding watermark", 0.35)
+    image = apply_watermark(image, watermark_text, position, font_size, font_color, font_path, opacity)
+
+    if image_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+        image = image.convert("RGB")  # JPEG cannot store transparency
+
+    progress.update("Encoding", 0.45)
+    buffer = ProgressBuffer(progress)
+    image.save(buffer, format=image_format, **encoder_options(image_format, preset))
+
+    progress.update("Writing file", 0.95)
+    with open(save_path, "wb") as file:
+        file.write(buffer.getbuffer())
+    progress.update("Done", 1.0)
+    return save_path
+
+
 # Function to save the image with the watermark
 def save_image():
     """
     Saves the watermarked image to a user-specified location.
+    The work is done in the save thread. The progress bar shows how far it has got, and it can be cancelled.
     """
+    global save_progress
     if not original_image_path:  # Check if an image is loaded
         messagebox.showerror("Error", "No image loaded.")  # Show error if no image is loaded
         return
@@ -88,19 +593,52 @@ def save_image():
     position = position_var.get()  # Get the watermark position from the dropdown
     font_size = size_slider.get()  # Get the font size from the slider
     font_color = color_var.get()  # Get the selected font color
-
-    # Add the watermark to the image using the selected options
-    watermarked_image = add_watermark(original_image_path, watermark_text, position, font_size, font_color)
+    opacity = opacity_slider.get() / 100  # Get the opacity from the slider (0.0 to 1.0)
+    preset = preset_var.get()  # Get the encoder preset
 
     # Ask the user where to save the image
     file_types = [("PNG files", "*.png"), ("JPEG files", "*.jpg;*.jpeg")]  # Supported file types
     save_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=file_types)  # File save dialog
-    if save_path:  # If a save path is selected
-        try:
-            watermarked_image.save(save_path)  # Save the image with the watermark
-            messagebox.showinfo("Success", f"Watermarked image saved as {save_path}")  # Success message
-        except Exception as e:
-            messagebox.showerror("Error", f"Unable to save image: {str(e)}")  # Error message if save fails
+    if not save_path:  # If no save path is selected
+        return
+
+    # Add the watermark and save the image in the save thread
+    save_progress = SaveProgress()
+    future = save_executor.submit(save_watermarked, original_image_path, save_path, watermark_text, position,
+                                  font_size, font_color, selected_font, opacity, preset, save_progress)
+    save_button.config(state="disabled")  # Only one save at a time
+    cancel_button.config(state="normal")
+    root.after(SAVE_POLL, show_save_progress, future, save_progress)
+
+
+# Function to update the progress bar until the save has finished
+def show_save_progress(future, progress):
+    if not future.done():
+        progress_bar["value"] = progress.fraction * 100
+        progress_label.config(text=f"{progress.stage}... ({progress.bytes_written / 1e6:.1f} MB written)"
+                              if progress.bytes_written else f"{progress.stage}...")
+        root.after(SAVE_POLL, show_save_progress, future, progress)  # Check again a bit later
+        return
+
+    save_button.config(state="normal")
+    cancel_button.config(state="disabled")
+    progress_bar["value"] = 0
+    progress_label.config(text="")
+    try:
+        save_path = future.result()
+    except SaveCancelled:
+        progress_label.config(text="Save cancelled.")
+    except Exception as e:
+        messagebox.showerror("Error", f"Unable to save image: {str(e)}")  # Error message if save fails
+    else:
+        messagebox.showinfo("Success", f"Watermarked image saved as {save_path}")  # Success message
+
+
+# Function to cancel the save that is running
+def cancel_save():
+    if save_progress is not None:
+        save_progress.cancel()
+        progress_label.config(text="Cancelling...")
 
 
 # Function to select the font for the watermark text
@@ -112,6 +650,7 @@ def select_font():
     file_path = filedialog.askopenfilename(filetypes=[("Font Files", "*.ttf *.otf")])  # Font file types
     if file_path:  # If a font is selected
         selected_font = file_path  # Store the font file path globally
+        schedule_preview()  # Show the new font in the preview
 
 
 # Function to open the color chooser and update the color preview
@@ -123,91 +662,128 @@ def choose_color():
     if color_code:  # If a color is selected
         color_var.set(color_code)  # Update the color variable
         color_preview.config(bg=color_code)  # Update the color preview label
+        schedule_preview()  # Show the new color in the preview
 
 
-# GUI setup using Tkinter
-root = tk.Tk()  # Create the main application window
-root.title("Image Watermarking Tool")  # Set the window title
+# Function to update the scroll region of the canvas when the inner frame changes
+def update_scroll_region(event):
+    canvas.config(scrollregion=canvas.bbox("all"))  # Update the scrollable area to match the inner frame
 
-# Global variables to store the state
-original_image_path = None  # Variable to store the image path
-selected_font = "arial.ttf"  # Default font path (Arial)
 
-# Create a frame for the content within the main window
-frame = tk.Frame(root)
-frame.pack(padx=10, pady=10, fill="both", expand=True)
+# Function to build and run the GUI
+def main():
+    """
+    Creates the main window with all its widgets and runs the application.
+    The widgets are stored in global variables, so the functions above can use them.
+    """
+    global root, canvas, panel, watermark_entry, color_var, color_preview, size_slider, opacity_slider, position_var
+    global preset_var, save_button, cancel_button, progress_bar, progress_label
 
-# Add a canvas to the frame with a vertical scrollbar for scrolling content
-canvas = tk.Canvas(frame)
-scrollbar = tk.Scrollbar(frame, orient="vertical", command=canvas.yview)  # Create a scrollbar
-canvas.configure(yscrollcommand=scrollbar.set)  # Configure the canvas to use the scrollbar
+    # GUI setup using Tkinter
+    root = tk.Tk()  # Create the main application window
+    root.title("Image Watermarking Tool")  # Set the window title
 
-# Create a second frame inside the canvas to hold all the widgets (buttons, text fields, etc.)
-inner_frame = tk.Frame(canvas)
+    # Create a frame for the content within the main window
+    frame = tk.Frame(root)
+    frame.pack(padx=10, pady=10, fill="both", expand=True)
 
-# Add the inner frame to the canvas window (to make it scrollable)
-canvas.create_window((0, 0), window=inner_frame, anchor="nw")
+    # Add a canvas to the frame with a vertical scrollbar for scrolling content
+    canvas = tk.Canvas(frame)
+    scrollbar = tk.Scrollbar(frame, orient="vertical", command=canvas.yview)  # Create a scrollbar
+    canvas.configure(yscrollcommand=scrollbar.set)  # Configure the canvas to use the scrollbar
 
-# Configure the scrollbar to work with the canvas
-scrollbar.pack(side="right", fill="y")
-canvas.pack(side="left", fill="both", expand=True)
+    # Create a second frame inside the canvas to hold all the widgets (buttons, text fields, etc.)
+    inner_frame = tk.Frame(canvas)
 
-# Add a button for opening an image file
-open_button = tk.Button(inner_frame, text="Open Image", command=open_image)
-open_button.pack(pady=5)
+    # Add the inner frame to the canvas window (to make it scrollable)
+    canvas.create_window((0, 0), window=inner_frame, anchor="nw")
 
-# Add a button for selecting the font
-font_button = tk.Button(inner_frame, text="Select Font", command=select_font)
-font_button.pack(pady=5)
+    # Configure the scrollbar to work with the canvas
+    scrollbar.pack(side="right", fill="y")
+    canvas.pack(side="left", fill="both", expand=True)
 
-# Add a label and text field for entering the watermark text
-watermark_label = tk.Label(inner_frame, text="Enter Watermark Text:")
-watermark_label.pack()
+    # Add a button for opening an image file
+    open_button = tk.Button(inner_frame, text="Open Image", command=open_image)
+    open_button.pack(pady=5)
 
-watermark_entry = tk.Entry(inner_frame, width=40)
-watermark_entry.pack(pady=5)
+    # Add a button for selecting the font
+    font_button = tk.Button(inner_frame, text="Select Font", command=select_font)
+    font_button.pack(pady=5)
 
-# Add a button for selecting the text color
-color_button = tk.Button(inner_frame, text="Select Text Color", command=choose_color)
-color_button.pack(pady=5)
+    # Add a label and text field for entering the watermark text
+    watermark_label = tk.Label(inner_frame, text="Enter Watermark Text:")
+    watermark_label.pack()
 
-# Add a label to preview the selected color
-color_var = tk.StringVar(value="#FFFFFF")  # Default color is white
-color_preview = tk.Label(inner_frame, text="Color Preview", bg=color_var.get(), width=20)
-color_preview.pack(pady=5)
+    watermark_entry = tk.Entry(inner_frame, width=40)
+    watermark_entry.pack(pady=5)
+    watermark_entry.bind("<KeyRelease>", schedule_preview)  # Update the preview while typing
 
-# Add a slider for selecting the font size
-size_label = tk.Label(inner_frame, text="Font Size:")
-size_label.pack(pady=5)
+    # Add a button for selecting the text color
+    color_button = tk.Button(inner_frame, text="Select Text Color", command=choose_color)
+    color_button.pack(pady=5)
 
-size_slider = tk.Scale(inner_frame, from_=10, to=100, orient="horizontal", length=200, label="Font Size")
-size_slider.set(30)  # Default font size is 30
-size_slider.pack(pady=5)
+    # Add a label to preview the selected color
+    color_var = tk.StringVar(value="#FFFFFF")  # Default color is white
+    color_preview = tk.Label(inner_frame, text="Color Preview", bg=color_var.get(), width=20)
+    color_preview.pack(pady=5)
 
-# Add a dropdown for selecting the watermark position
-position_var = tk.StringVar(value="bottom-right")  # Default position is bottom-right
-position_label = tk.Label(inner_frame, text="Choose Watermark Position:")
-position_label.pack(pady=5)
+    # Add a slider for selecting the font size
+    size_label = tk.Label(inner_frame, text="Font Size:")
+    size_label.pack(pady=5)
 
-position_menu = tk.OptionMenu(inner_frame, position_var, "top-left", "top-right", "bottom-left", "bottom-right")
-position_menu.pack(pady=5)
+    size_slider = tk.Scale(inner_frame, from_=10, to=100, orient="horizontal", length=200, label="Font Size",
+                           command=schedule_preview)
+    size_slider.set(30)  # Default font size is 30
+    size_slider.pack(pady=5)
 
-# Add a button to save the image with the watermark
-save_button = tk.Button(inner_frame, text="Save Watermarked Image", command=save_image)
-save_button.pack(pady=10)
+    # Add a slider for selecting how opaque the text is (100% is solid, lower values let the image show through)
+    opacity_slider = tk.Scale(inner_frame, from_=0, to=100, orient="horizontal", length=200, label="Opacity (%)",
+                              command=schedule_preview)
+    opacity_slider.set(100)  # Default is solid text
+    opacity_slider.pack(pady=5)
 
-# Create a label to display the selected image
-panel = tk.Label(inner_frame)
-panel.pack(padx=10, pady=10)
+    # Add a dropdown for selecting the watermark position
+    position_var = tk.StringVar(value="bottom-right")  # Default position is bottom-right
+    position_label = tk.Label(inner_frame, text="Choose Watermark Position:")
+    position_label.pack(pady=5)
 
+    position_menu = tk.OptionMenu(inner_frame, position_var, *POSITIONS)
+    position_menu.pack(pady=5)
+    position_var.trace_add("write", schedule_preview)  # Update the preview when another position is chosen
 
-# Function to update the scroll region of the canvas when the inner frame changes
-def update_scroll_region(event):
-    canvas.config(scrollregion=canvas.bbox("all"))  # Update the scrollable area to match the inner frame
+    # Add a dropdown for selecting the encoder preset (how much time is spent on making the file small)
+    preset_var = tk.StringVar(value="balanced")  # Default preset is balanced
+    preset_label = tk.Label(inner_frame, text="Save Preset (fast / balanced / smallest):")
+    preset_label.pack(pady=5)
+
+    preset_menu = tk.OptionMenu(inner_frame, preset_var, *ENCODER_PRESETS)
+    preset_menu.pack(pady=5)
+
+    # Add a button to save the image with the watermark
+    save_button = tk.Button(inner_frame, text="Save Watermarked Image", command=save_image)
+    save_button.pack(pady=10)
+
+    # Add a progress bar, a status label and a cancel button for saving
+    progress_bar = ttk.Progressbar(inner_frame, length=200, maximum=100)
+    progress_bar.pack(pady=5)
+
+    progress_label = tk.Label(inner_frame, text="")
+    progress_label.pack()
+
+    cancel_button = tk.Button(inner_frame, text="Cancel Save", command=cancel_save, state="disabled")
+    cancel_button.pack(pady=5)
+
+    # Create a label to display the selected image
+    panel = tk.Label(inner_frame)
+    panel.pack(padx=10, pady=10)
+
+    # Bind the event to update the scroll region when the content size changes
+    inner_frame.bind("<Configure>", update_scroll_region)
 
+    # Run the Tkinter application
+    root.mainloop()
 
-# Bind the event to update the scroll region when the content size changes
-inner_frame.bind("<Configure>", update_scroll_region)
 
-# Run the Tkinter application
-root.mainloop()
+# Run the application only when this file is executed directly (not when it is imported by another script)
+if __name__ == "__main__":
+    main()
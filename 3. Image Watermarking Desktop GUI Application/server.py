@@ -0,0 +1,314 @@
+# Import the libraries for the watermark service
+import argparse  # To read the command-line options
+import asyncio  # To serve many clients from one process
+import io  # To decode and encode the images in memory
+import json  # To report the statistics
+import math  # To reject settings that are not finite numbers
+import os  # To get the number of CPU cores
+import time  # To measure latency and throughput
+from collections import deque  # To keep the most recent latencies
+from concurrent.futures import ProcessPoolExecutor  # To watermark on every CPU core
+from urllib.parse import parse_qs, urlsplit  # To read the watermark settings from the URL
+
+from PIL import Image  # Pillow for image manipulation
+
+from main import (ENCODER_PRESETS, MEMORY_LIMIT, PATTERN_ANGLE, POSITIONS, apply_watermark, decoded_size,
+                  keep_options, selected_font)  # The same watermark function the GUI uses
+
+# Default settings of the service
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8081
+MAX_QUEUE = 256  # Images waiting to be watermarked. Further requests get '503 Service Unavailable'.
+MAX_QUEUED_BYTES = 512 * 1024 * 1024  # The total size of the waiting images. Further requests get '503 Service Unavailable'.
+MAX_BODY = 64 * 1024 * 1024  # The largest accepted image, in bytes
+LATENCY_SAMPLES = 10_000  # How many recent latencies are kept for the percentiles
+
+
+# Function that watermarks an image held in memory. It runs inside the worker processes.
+def watermark_bytes(data, text, position, font_size, font_color, font_path, opacity, angle, output_format, preset,
+                    memory_limit):
+    """
+    Decodes an image from bytes, adds the watermark and encodes it again, all in memory.
+    The worker processes live as long as the service, so the fonts and stamps cached by main.py
+    are re-used by every request with the same settings.
+
+    :param output_format: The format to encode to ('PNG', 'JPEG', ...), or None for the format of the input.
+    :param preset: A name from ENCODER_PRESETS, or None to keep the original JPEG settings.
+    :return: A tuple (encoded bytes, MIME type).
+    :raises ValueError: If the image is too large or a setting is wrong.
+    :raises OSError: If the bytes are not an image Pillow can read.
+    """
+    image = Image.open(io.BytesIO(data))
+    if decoded_size(image, position) > memory_limit:
+        raise ValueError(f"The image needs {decoded_size(image, position) / 1e6:,.0f} MB to decode and watermark, more than the memory limit")
+    image = apply_watermark(image, text, position, font_size, font_color, font_path, opacity, angle)
+
+    output_format = output_format or image.format or "PNG"
+    options = keep_options(image, preset) if output_format == image.format else {}
+    if preset and output_format != image.format:
+        options.update(ENCODER_PRESETS[preset].get(output_format, {}))
+    if output_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+        image = image.convert("RGB")  # JPEG cannot store transparency
+    buffer = io.BytesIO()
+    image.save(buffer, format=output_format, **options)
+    return buffer.getvalue(), Image.MIME.get(output_format, "application/octet-stream")
+
+
+# Function to read the watermark settings from the query string of a request
+def parse_settings(query, font_path):
+    """
+    Turns the query string into the arguments of watermark_bytes (without the image data and memory limit).
+    The font cannot be chosen by the client, so the service never opens files named in a request.
+
+    :raises ValueError: If a setting is missing or wrong.
+    """
+    fields = {name: values[-1] for name, values in parse_qs(query).items()}
+    text = fields.get("text")
+    if not text:
+        raise ValueError("The 'text' parameter is required.")
+    position = fields.get("position", "bottom-right")
+    if position not in POSITIONS:
+        raise ValueError(f"'position' must be one of {', '.join(POSITIONS)}.")
+    preset = fields.get("preset") or None
+    if preset is not None and preset not in ENCODER_PRESETS:
+        raise ValueError(f"'preset' must be one of {', '.join(ENCODER_PRESETS)}.")
+    output_format = fields.get("format", "").upper() or None
+    if output_format == "JPG":
+        output_format = "JPEG"
+    Image.init()  # Load all of Pillow's format plugins, so Image.SAVE lists every format it can write
+    if output_format is not None and output_format not in Image.SAVE:
+        raise ValueError(f"Pillow cannot save the format '{output_format}'.")
+    font_size = int(fields.get("size", 30))
+    if not 1 <= font_size <= 2000:
+        raise ValueError("'size' must be between 1 and 2000.")
+    opacity = float(fields.get("opacity", 100))
+    angle = float(fields.get("angle", PATTERN_ANGLE))
+    if not (math.isfinite(opacity) and math.isfinite(angle)):
+        raise ValueError("'opacity' and 'angle' must be finite numbers.")
+    opacity = min(max(opacity / 100, 0.0), 1.0)  # In percent, like the GUI slider
+    return (text, position, font_size, fields.get("color", "#FFFFFF"), font_path, opacity, angle, output_format, preset)
+
+
+# Class that queues watermark requests and hands them to the process pool
+class WatermarkService:
+    """
+    Keeps a bounded queue of images and a few dispatcher tasks that pass them to the process pool.
+    The pool never gets more work than it has workers for. The queue is limited both by the number of images
+    and by their total size, and when either is reached new requests are rejected straight away (backpressure),
+    so a flood of uploads cannot use up all the memory.
+    """
+
+    def __init__(self, executor, workers, max_queue=MAX_QUEUE, memory_limit=MEMORY_LIMIT,
+                 max_queued_bytes=MAX_QUEUED_BYTES):
+        self.executor = executor
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.queued_bytes = 0
+        self.max_queued_bytes = max_queued_bytes
+        self.memory_limit = memory_limit
+        self.started = time.monotonic()
+        self.requests = 0
+        self.rejected = 0
+        self.errors = 0
+        self.busy = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    async def submit(self, data, settings):
+        """
+        Queues an image and waits until it is watermarked.
+
+        :param data: The image file as bytes.
+        :param settings: The settings from parse_settings.
+        :return: A tuple (encoded bytes, MIME type).
+        :raises asyncio.QueueFull: If too many images, or too many bytes of images, are already waiting.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            if self.queued_bytes + len(data) > self.max_queued_bytes:
+                raise asyncio.QueueFull
+            self.queue.put_nowait((data, settings, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        self.queued_bytes += len(data)
+        return await future
+
+    async def dispatch(self):
+        """
+        Takes images from the queue and watermarks them in the process pool, one at a time, forever.
+        One of these runs for every worker process.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            data, settings, future, queued = await self.queue.get()
+            self.queued_bytes -= len(data)
+            self.busy += 1
+            try:
+                result = await loop.run_in_executor(self.executor, watermark_bytes, data, *settings, self.memory_limit)
+            except Exception as e:  # Bad images and settings are reported to the client; the dispatcher keeps going
+                self.errors += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.requests += 1
+                self.bytes_in += len(data)
+                self.bytes_out += len(result[0])
+                self.latencies.append(time.perf_counter() - queued)
+                if not future.done():  # The client may have disconnected
+                    future.set_result(result)
+            finally:
+                self.busy -= 1
+
+    def stats(self):
+        """
+        Returns the counters of the service as a dictionary.
+        """
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000 if latencies else 0.0
+
+        return {
+            "uptime_seconds": round(uptime, 3),
+            "workers": self.workers,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "queued": self.queue.qsize(),
+            "queued_megabytes": round(self.queued_bytes / 1e6, 3),
+            "in_progress": self.busy,
+            "requests_per_second": round(self.requests / uptime, 2) if uptime else 0.0,
+            "megabytes_in": round(self.bytes_in / 1e6, 3),
+            "megabytes_out": round(self.bytes_out / 1e6, 3),
+            "latency_ms": {"p50": round(percentile(0.5), 3), "p90": round(percentile(0.9), 3),
+                           "p99": round(percentile(0.99), 3), "max": round(latencies[-1] * 1000, 3) if latencies else 0.0},
+        }
+
+
+# Function to send an HTTP response
+async def send_response(writer, status, body, content_type="text/plain; charset=utf-8", keep_alive=True):
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    writer.write(
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("ascii") + data
+    )
+    await writer.drain()  # Wait if the client reads slowly (backpressure on the way out)
+
+
+# Function that serves one client connection
+async def handle_client(service, font_path, reader, writer):
+    """
+    Reads HTTP requests from one connection and answers them, until the client closes it.
+
+    POST /watermark?text=...  with an image file in the body returns the watermarked image.
+        Optional settings: position, size, color, opacity (percent), angle, format and preset.
+    GET  /stats               returns the latency and throughput counters as JSON.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break  # The client closed the connection
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                await send_response(writer, "400 Bad Request", "Bad request line.\n", keep_alive=False)
+                break
+
+            # Read the headers
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+            content_length = headers.get("content-length") or "0"
+            if not (content_length.isascii() and content_length.isdigit()):
+                await send_response(writer, "400 Bad Request", "Content-Length must be a non-negative integer.\n", keep_alive=False)
+                break
+            length = int(content_length)
+            if length > MAX_BODY:
+                await send_response(writer, "413 Payload Too Large", f"The body is limited to {MAX_BODY} bytes.\n", keep_alive=False)
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            url = urlsplit(target)
+            operation = url.path.strip("/")
+            if method == "GET" and operation == "stats":
+                await send_response(writer, "200 OK", json.dumps(service.stats()) + "\n", "application/json", keep_alive)
+            elif method == "POST" and operation == "watermark":
+                try:
+                    if not body:
+                        raise ValueError("Send the image file in the request body.")
+                    image, content_type = await service.submit(body, parse_settings(url.query, font_path))
+                except asyncio.QueueFull:
+                    await send_response(writer, "503 Service Unavailable", "Too many requests, try again later.\n", keep_alive=keep_alive)
+                except (OSError, ValueError, Image.DecompressionBombError) as e:
+                    await send_response(writer, "400 Bad Request", f"{e}\n", keep_alive=keep_alive)
+                except Exception as e:
+                    await send_response(writer, "500 Internal Server Error", f"{e}\n", keep_alive=keep_alive)
+                else:
+                    await send_response(writer, "200 OK", image, content_type, keep_alive)
+            else:
+                await send_response(writer, "404 Not Found", "Use POST /watermark?text=... or GET /stats.\n", keep_alive=keep_alive)
+
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass  # The client went away in the middle of a request
+    finally:
+        writer.close()
+
+
+# Function to start the service
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, max_queue=MAX_QUEUE, font_path=selected_font,
+                memory_limit=MEMORY_LIMIT, max_queued_bytes=MAX_QUEUED_BYTES):
+    """
+    Starts the watermark service and runs it until it is stopped.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Start the worker processes before any client connects. On Linux they are forked from this process,
+        # and a worker forked later would inherit the open connections and keep them from closing.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, os.getpid) for _ in range(workers)))
+        service = WatermarkService(executor, workers, max_queue, memory_limit, max_queued_bytes)
+        dispatchers = [asyncio.create_task(service.dispatch()) for _ in range(workers)]
+        server = await asyncio.start_server(lambda reader, writer: handle_client(service, font_path, reader, writer),
+                                            host, port, backlog=4096)
+        print(f"Watermark service listening on http://{host}:{port} with {workers} worker(s) "
+              "(POST /watermark?text=..., GET /stats)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for dispatcher in dispatchers:
+                dispatcher.cancel()
+
+
+# Run the service if this file is executed directly
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve image watermarking over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="number of worker processes (default: all cores)")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE, help="images that may wait before new requests are rejected")
+    parser.add_argument("--max-queued-mb", type=int, default=MAX_QUEUED_BYTES // 2**20,
+                        help=f"total MB of images that may wait before new requests are rejected (default {MAX_QUEUED_BYTES // 2**20})")
+    parser.add_argument("-f", "--font", default=selected_font, help=f"font file for the watermarks (default {selected_font})")
+    parser.add_argument("--memory-limit", type=int, default=MEMORY_LIMIT // 2**20,
+                        help=f"MB a worker may use to decode one image (default {MEMORY_LIMIT // 2**20})")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_queue, args.font, args.memory_limit * 2**20,
+                          args.max_queued_mb * 2**20))
+    except KeyboardInterrupt:
+        print("Stopped.")
@@ -5,6 +5,55 @@ import requests
 import json
 import os
 
+# Milliseconds between updates of the live WPM label. Keystrokes in between are combined into one update.
+LIVE_WPM_INTERVAL = 200
+
+
+class TypingState:
+    """
+    Keeps the word and character counts of the typed text up to date from each edit,
+    so a keystroke costs the same however long the text already is.
+    A word starts at every non-space character that follows a space (or the start of the text),
+    which gives the same count as len(text.split()).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.words = 0
+        self.characters = 0
+
+    def recount(self, text):
+        """Count the whole text again, for edits that are too involved to follow one by one."""
+        self.words = len(text.split())
+        self.characters = len(text)
+
+    @staticmethod
+    def starts_word(char, previous):
+        """Return 1 if char starts a word when it follows previous ("" means the start of the text)."""
+        return 1 if char and not char.isspace() and (not previous or previous.isspace()) else 0
+
+    @classmethod
+    def count_starts(cls, text, before, after):
+        """Count the words that start inside text, or at the character after it, when text sits between before and after."""
+        starts = 0
+        previous = before
+        for char in text:
+            starts += cls.starts_word(char, previous)
+            previous = char
+        return starts + cls.starts_word(after, previous)
+
+    def insert(self, text, before, after):
+        """Record that text was inserted between the characters before and after."""
+        self.words += self.count_starts(text, before, after) - self.starts_word(after, before)
+        self.characters += len(text)
+
+    def delete(self, text, before, after):
+        """Record that text was deleted from between the characters before and after."""
+        self.words -= self.count_starts(text, before, after) - self.starts_word(after, before)
+        self.characters -= len(text)
+
 
 class TypingSpeedTest:
     def __init__(self, root):
@@ -15,6 +64,9 @@ class TypingSpeedTest:
         self.selected_paragraph = ""
         self.start_time = None
         self.username = ""
+        self.typing_state = TypingState()
+        self.live_wpm_job = None
+        self.live_wpm_text = "Live WPM: 0.00"
 
         # Black and Yellow Theme
         self.bg_color = "#000000"  # Black background
@@ -74,7 +126,7 @@ class TypingSpeedTest:
         self.typing_area = tk.Text(self.main_frame, height=10, wrap="word", font=("Helvetica", 14), bg=self.text_area_bg, fg=self.text_area_fg, bd=0, padx=10, pady=10, insertbackground=self.text_area_fg)
         self.typing_area.pack(padx=20, pady=10)
         self.typing_area.bind("<FocusIn>", self.start_timer)
-        self.typing_area.bind("<KeyRelease>", self.update_live_wpm)
+        self.watch_typing_area()
 
         # Live WPM Display
         self.live_wpm_label = tk.Label(self.main_frame, text="Live WPM: 0.00", font=("Helvetica", 14), bg=self.bg_color, fg=self.text_color)
@@ -118,21 +170,79 @@ class TypingSpeedTest:
         if self.start_time is None:
             self.start_time = time.time()
 
-    def update_live_wpm(self, event):
-        """Update the live WPM as the user types."""
+    def watch_typing_area(self):
+        """
+        Route every insert and delete of the text area through typing_area_edit.
+        This sees typing, pasting, cutting and deleting a selection alike, because Tk's own
+        key bindings call the widget's insert and delete commands too.
+        """
+        widget = str(self.typing_area)
+        self.typing_area_command = widget + "_original"
+        self.root.tk.call("rename", widget, self.typing_area_command)
+        self.root.tk.createcommand(widget, self.typing_area_edit)
+
+    def typing_area_edit(self, command, *args):
+        """Update the typing state for an insert or delete, then pass the command on to the text area."""
+        if command == "insert":
+            self.record_insert(args[0], "".join(args[1::2]))  # insert index chars ?tags chars tags ...?
+        elif command == "delete" and len(args) in (1, 2):
+            self.record_delete(*args)
+        elif command == "delete":
+            # Several ranges at once: Tk sorts and merges them itself, so count the text again afterwards
+            result = self.root.tk.call(self.typing_area_command, command, *args)
+            self.typing_state.recount(self.typing_area.get("1.0", "end-1c"))
+            self.schedule_live_wpm()
+            return result
+        elif command == "replace":
+            self.record_delete(args[0], args[1])
+            self.root.tk.call(self.typing_area_command, "delete", args[0], args[1])
+            self.record_insert(args[0], "".join(args[2::2]))
+            return self.root.tk.call(self.typing_area_command, "insert", args[0], *args[2:])
+        return self.root.tk.call(self.typing_area_command, command, *args)
+
+    def record_insert(self, index, text):
+        if not text:
+            return
+        area = self.typing_area
+        if area.compare(index, ">=", "end-1c"):
+            index = "end-1c"  # Tk inserts text at the end in front of its final newline
+        index = area.index(index)
+        before = "" if area.compare(index, "==", "1.0") else area.get(f"{index}-1c")
+        self.typing_state.insert(text, before, area.get(index))
+        self.schedule_live_wpm()
+
+    def record_delete(self, first, last=None):
+        area = self.typing_area
+        first = area.index(first)
+        last = area.index(last) if last else area.index(f"{first}+1c")
+        if area.compare(last, ">", "end-1c"):
+            last = area.index("end-1c")  # The final newline is never deleted
+        if area.compare(first, ">=", last):
+            return
+        before = "" if area.compare(first, "==", "1.0") else area.get(f"{first}-1c")
+        self.typing_state.delete(area.get(first, last), before, area.get(last))
+        self.schedule_live_wpm()
+
+    def schedule_live_wpm(self):
+        """Update the live WPM label soon, combining all the edits made until then into one update."""
+        if self.live_wpm_job is None:
+            self.live_wpm_job = self.root.after(LIVE_WPM_INTERVAL, self.update_live_wpm)
+
+    def update_live_wpm(self):
+        """Update the live WPM from the word count kept by the typing state."""
+        self.live_wpm_job = None
         if self.start_time is None:
             return
 
-        current_time = time.time()
-        time_elapsed = current_time - self.start_time
-        typed_text = self.typing_area.get("1.0", "end-1c").strip()
-
-        if typed_text:
-            word_count = len(typed_text.split())
-            live_wpm = (word_count / time_elapsed) * 60
-            self.live_wpm_label.config(text=f"Live WPM: {live_wpm:.2f}")
+        time_elapsed = time.time() - self.start_time
+        if self.typing_state.words and time_elapsed > 0:
+            live_wpm = (self.typing_state.words / time_elapsed) * 60
+            text = f"Live WPM: {live_wpm:.2f}"
         else:
-            self.live_wpm_label.config(text="Live WPM: 0.00")
+            text = "Live WPM: 0.00"
+        if text != self.live_wpm_text:  # Only redraw the label when the number changes
+            self.live_wpm_text = text
+            self.live_wpm_label.config(text=text)
 
     def calculate_speed(self):
         if self.start_time is None:
@@ -178,8 +288,13 @@ class TypingSpeedTest:
 
     def reset_test(self):
         self.typing_area.delete("1.0", "end")
+        self.typing_state.reset()
         self.start_time = None
-        self.live_wpm_label.config(text="Live WPM: 0.00")
+        if self.live_wpm_job is not None:
+            self.root.after_cancel(self.live_wpm_job)
+            self.live_wpm_job = None
+        self.live_wpm_text = "Live WPM: 0.00"
+        self.live_wpm_label.config(text=self.live_wpm_text)
 
     def load_leaderboard(self):
         if os.path.exists(self.leaderboard_file):